@@ -0,0 +1,342 @@
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+import watersort
+
+LEVELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "wslevels")
+
+def readLevel(level: str) -> watersort.Game:
+  with contextlib.redirect_stdout(io.StringIO()):
+    return watersort.readGameFile(os.path.join(LEVELS_PATH, f"{level}.txt"), level)
+
+class QuietSolver(watersort.BaseSolver):
+  """Searches without prompting or printing the solution."""
+  def _onInitSolutionAttempt(self, bypassErrorCorrection=False):
+    return super()._onInitSolutionAttempt(bypassErrorCorrection=True)
+  def _onAfterFindSolutions(self):
+    pass
+  def _onImpossibleGame(self):
+    return False
+  def _onIterationReport(self, current):
+    return True
+
+class QuietSolutionSolver(watersort.SolutionSolver):
+  """Records the move count of each shorter solution reported by `_onShorterSolutionFound`, without printing it."""
+  reportedMoves: list[int]
+
+  def __init__(self, game):
+    super().__init__(game)
+    self.reportedMoves = []
+  def _onShorterSolutionFound(self, numMoves):
+    self.reportedMoves.append(numMoves)
+
+def pinSolveSettings():
+  """Restores the solve method globals, which setSolveMethod changes for every later search, on exit."""
+  return mock.patch.multiple(watersort, SOLVE_METHOD=watersort.SOLVE_METHOD, SHUFFLE_NEXT_MOVES=watersort.SHUFFLE_NEXT_MOVES,
+                             DFR_SEARCH_ATTEMPTS=watersort.DFR_SEARCH_ATTEMPTS,
+                             AUTO_BFS_FOR_UNKNOWNS_ORIG_METHOD=watersort.AUTO_BFS_FOR_UNKNOWNS_ORIG_METHOD)
+
+def search(level: str, solveMethod: str, **settings) -> QuietSolver:
+  solver = QuietSolver(readLevel(level))
+  for name, value in settings.items():
+    setattr(solver, name, value)
+  with contextlib.redirect_stdout(io.StringIO()), pinSolveSettings():
+    solver._findSolutions(solveMethod)
+  return solver
+
+class DeadEndTest(unittest.TestCase):
+  def countDeadEnds(self, level: str, pruneCommutingMoves: bool) -> int:
+    return search(level, "BFS", pruneCommutingMoves=pruneCommutingMoves).numDeadEnds
+
+  def testPruningCommutingMovesKeepsDeadEnds(self):
+    # Games whose moves all commute with the previous move still have moves, so they aren't dead ends
+    for level in ["110", "112"]:
+      with self.subTest(level=level):
+        self.assertEqual(self.countDeadEnds(level, True), self.countDeadEnds(level, False))
+
+  def countReachable(self, game: watersort.BaseGame) -> tuple[int, int]: # (numDeadEnds, numSolutions)
+    """Visits every (board, filled vial) pair reachable from the game, without any of the counter's sharing."""
+    reached = {(game._state, game.move[1])}
+    deadEnds, solutions = set(), set()
+    stack = [game]
+    while stack:
+      game = stack.pop()
+      moves = game.generateNextMoves(pruneCommuting=False)
+      if not moves:
+        deadEnds.add(game._state)
+      for nextGame in game.generateNextNodes(moves):
+        if nextGame.isFinished():
+          solutions.add(nextGame._state)
+        elif (nextGame._state, nextGame.move[1]) not in reached:
+          reached.add((nextGame._state, nextGame.move[1]))
+          stack.append(nextGame)
+    return (len(deadEnds), len(solutions))
+
+  def testStepCounterCountsEveryReachableGame(self):
+    for level in ["112", "2025/dec15"]:
+      solution = search(level, "BFS").minSolution
+      counter = watersort.StepDeadEndCounter(solution.root)
+      game = solution.prev
+      while game.getDepth() > 2:
+        results = counter.countStep(game)
+        with self.subTest(level=level, depth=game.getDepth()):
+          self.assertEqual(self.countReachable(game), (results.numDeadEnds, results.numEventualSolutions))
+        game = game.prev
+
+  def testStepCounterMarksCappedStepPartial(self):
+    solution = search("112", "BFS").minSolution
+    counter = watersort.StepDeadEndCounter(solution.root)
+    game = solution.prev
+    with mock.patch.object(watersort.StepDeadEndCounter, "MAX_GAMES", 500):
+      results = counter.countStep(game)
+      while not results.isPartial:
+        game = game.prev
+        results = counter.countStep(game)
+      self.assertIsNone(counter.countStep(game.prev))
+
+class TranspositionTableTest(unittest.TestCase):
+  def setUp(self):
+    root = readLevel("110")
+    self.games = [grandchild for child in root.generateNextNodes() for grandchild in child.generateNextNodes()]
+
+  def testKeepsFewestMoves(self):
+    table = watersort.TranspositionTable(10)
+    game = self.games[0]
+    self.assertTrue(table.record(game, 5))
+    self.assertFalse(table.record(game, 5))
+    self.assertFalse(table.record(game, 6))
+    self.assertTrue(table.record(game, 4))
+    self.assertEqual(4, table.get(game))
+    self.assertEqual(1, table.numRecorded)
+
+  def testEvictsOldestGames(self):
+    table = watersort.TranspositionTable(8) # Evicts one game at a time
+    for game in self.games[:9]:
+      table.record(game, game._numMoves)
+    self.assertEqual(8, len(table))
+    self.assertEqual(9, table.numRecorded)
+    self.assertIsNone(table.get(self.games[0]))
+    for game in self.games[1:9]:
+      self.assertEqual(game._numMoves, table.get(game))
+
+  def testHashCollisionIsNotADuplicate(self):
+    table = watersort.TranspositionTable(10)
+    game, other = self.games[0], self.games[-1]
+    with mock.patch.object(watersort.TranspositionTable, "_getKey", staticmethod(lambda game, isFinished: 0)):
+      table.record(game, game._numMoves)
+      self.assertIsNone(table.get(other))
+      self.assertTrue(table.record(other, other._numMoves))
+      self.assertEqual(2, table.numRecorded)
+      self.assertIsNone(table.get(game)) # The first game is forgotten in favor of the newer one
+
+  def testPermutedGamesMatchOnlyWithTheSameBlockedVial(self):
+    table = watersort.TranspositionTable(10)
+    game = self.games[0]
+    start, end = game.move
+    order = list(range(game.getNumVials()))
+    swapWith = next(i for i in order if i not in (start, end) and game._state[i] != game._state[end])
+    order[end], order[swapWith] = order[swapWith], order[end]
+    permuted = watersort.SearchNode(tuple(game._state[i] for i in order), (start, swapWith), game.root)
+    otherBlocked = watersort.SearchNode(game._state, (start, swapWith), game.root)
+    table.record(game, game._numMoves)
+    self.assertEqual(game._numMoves, table.get(permuted))
+    self.assertIsNone(table.get(otherBlocked))
+
+class DuplicateGameTest(unittest.TestCase):
+  def testPermutedGamesKeepTheirBlockedVial(self):
+    # The solution pours out of a vial whose permuted twin was just filled, which the twin's moves don't allow
+    self.assertEqual(34, search("2025/dec15", "BFS").minSolution._numMoves)
+
+class ShortestSolutionTest(unittest.TestCase):
+  LEVELS = ["110", "112", "2023/dec8", "2024/aug2"]
+
+  def assertSameLengthAsBFS(self, solveMethod: str):
+    for level in self.LEVELS:
+      with self.subTest(level=level):
+        expected = search(level, "BFS").minSolution._numMoves
+        self.assertEqual(expected, search(level, solveMethod).minSolution._numMoves)
+
+  def testPruningCommutingMovesKeepsDrainSolutions(self):
+    # Drain moves change which vial is blocked next, and the solution needs a move in the order the pruning would skip
+    level = "2025/dec15"
+    pruned = search(level, "BFS", pruneCommutingMoves=True).minSolution._numMoves
+    unpruned = search(level, "BFS", pruneCommutingMoves=False).minSolution._numMoves
+    self.assertEqual(unpruned, pruned)
+    self.assertEqual(search(level, "IDA").minSolution._numMoves, pruned)
+    self.assertLessEqual(pruned, search(level, "DFS").minSolution._numMoves)
+
+  def testLowerBoundNeverOverestimates(self):
+    # A* only finds the shortest solution when the bound never exceeds the moves actually left
+    for level in self.LEVELS:
+      solution = search(level, "BFS").minSolution
+      game = solution
+      while game is not None:
+        with self.subTest(level=level, depth=game._numMoves):
+          self.assertLessEqual(game.getMinRemainingMoves(), solution._numMoves - game._numMoves)
+        game = game.prev
+
+  def testAStarFindsShortestSolution(self):
+    self.assertSameLengthAsBFS("ASTAR")
+
+  def testIDAFindsShortestSolution(self):
+    self.assertSameLengthAsBFS("IDA")
+
+class ParallelSearchTest(unittest.TestCase):
+  STATS = ["numIterations", "numDeadEnds", "numPartialSolutionsGenerated", "numSwallowedGamesFound",
+           "numUniqueStatesComputed", "numDuplicateGames", "maxQueueLength", "minSolutionUpdates"]
+
+  def setUp(self):
+    pinned = pinSolveSettings() # The parallel searches set the solve method too
+    pinned.start()
+    self.addCleanup(pinned.stop)
+
+  def testWorkersShareDFRAttempts(self):
+    shortest = search("110", "BFS").minSolution._numMoves
+    solver = QuietSolutionSolver(readLevel("110"))
+    solver.findSolutionCount = 20
+    with contextlib.redirect_stdout(io.StringIO()):
+      solver._findSolutionsInParallel("DFR", 2)
+    self.assertTrue(1 <= solver.solutionsAttempted <= 20)
+    self.assertTrue(solver.minSolution.isFinished())
+    self.assertLessEqual(shortest, solver.minSolution._numMoves)
+    # Only the main process reports solutions, ending with the shortest of every worker
+    self.assertEqual(solver.minSolution._numMoves, solver.reportedMoves[-1])
+    self.assertEqual(sorted(solver.reportedMoves, reverse=True), solver.reportedMoves)
+
+  def newAnalysisSolver(self) -> watersort.AnalysisSolver:
+    solver = watersort.AnalysisSolver(readLevel("110"))
+    # The counters are shared by the class, so each solver gets its own
+    for name in watersort.WorkerSolver.DEPTH_COUNTERS + ("uniqueSolsDepth",):
+      setattr(solver, name, watersort.defaultdict(int))
+    solver.uniqueSolutions = watersort.defaultdict(list)
+    solver.isUniqueList = []
+    solver.minSolutionUpdates = 0
+    solver.numSolutionsAbandoned = 0
+    return solver
+
+  def workerResults(self, solutionMoves, solutions, numIterations, maxQueueLength, deadEndDepth) -> watersort.WorkerResults:
+    counters = {name: {} for name in watersort.WorkerSolver.DEPTH_COUNTERS}
+    counters["deadEndDepth"] = deadEndDepth
+    summaries = [(attempt, watersort.SolutionSummary(completionStr, numMoves, [])) for attempt, completionStr, numMoves in solutions]
+    return watersort.WorkerResults(solutionMoves, len(solutions), 1, 0, numIterations, sum(deadEndDepth.values()), 0, 0, 0, 0,
+                                   maxQueueLength, counters, summaries)
+
+  def testMergesAnalysisSamples(self):
+    solver = self.newAnalysisSolver()
+    longSolution = search("110", "DFS", moveOrdering="GENERATED", branchAndBound=False, followMacroMoves=False).minSolution.getMovesFromRoot()
+    shortSolution = search("110", "BFS").minSolution.getMovesFromRoot()
+    solver._mergeWorkerResults([
+      self.workerResults(longSolution, [(4, "a b", 30), (2, "b a", 31)], 100, 7, {5: 1, 6: 2}),
+      self.workerResults(shortSolution, [(3, "a b", 25), (1, "c", 26)], 50, 9, {6: 3}),
+    ])
+    self.assertEqual(4, solver.solutionsAttempted)
+    self.assertEqual(150, solver.numIterations)
+    self.assertEqual(6, solver.numDeadEnds)
+    self.assertEqual(9, solver.maxQueueLength)
+    self.assertEqual({5: 1, 6: 5}, dict(solver.deadEndDepth))
+    self.assertLess(len(shortSolution), len(longSolution))
+    self.assertEqual(shortSolution, solver.minSolution.getMovesFromRoot())
+    # Samples are judged in the order they were claimed, from the most attempts left
+    self.assertEqual([True, False, True, True], solver.isUniqueList)
+    self.assertEqual({30: 1, 31: 1, 26: 1}, dict(solver.uniqueSolsDepth))
+
+  def testWorkersShareAnalysisSamples(self):
+    solver = self.newAnalysisSolver()
+    solver.findSolutionCount = 12
+    with contextlib.redirect_stdout(io.StringIO()):
+      solver._findSolutionsInParallel("DFR", 2)
+    self.assertEqual(12, solver.solutionsAttempted)
+    # Samples still quit once they can't beat the shortest solution, so some find none
+    self.assertTrue(0 < len(solver.isUniqueList) <= 12)
+    self.assertEqual(len(solver.isUniqueList), sum(solver.solutionDepth.values()))
+    self.assertEqual(len(solver.uniqueSolutions), sum(solver.uniqueSolsDepth.values()))
+
+  def testSplitBFSMatchesSingleProcess(self):
+    with mock.patch.multiple(watersort, SHUFFLE_NEXT_MOVES=False, SOLVE_METHOD="BFS"):
+      serial = search("110", "BFS")
+      parallel = QuietSolver(readLevel("110"))
+      with contextlib.redirect_stdout(io.StringIO()):
+        parallel._findSolutionsBFSInParallel(3)
+    self.assertEqual(serial.minSolution.getMovesFromRoot(), parallel.minSolution.getMovesFromRoot())
+    for stat in self.STATS:
+      with self.subTest(stat=stat):
+        self.assertEqual(getattr(serial, stat), getattr(parallel, stat))
+
+class BeamSearchTest(unittest.TestCase):
+  def testTrimKeepsBestGamesOfTheDepth(self):
+    root = readLevel("110")
+    games = [grandchild for child in root.generateNextNodes() for grandchild in child.generateNextNodes()]
+    solver = QuietSolver(root)
+    solver._q = watersort.deque(games)
+    with mock.patch.object(watersort, "BEAM_WIDTH", 3):
+      solver._trimBeam()
+    self.assertEqual(3, len(solver._q))
+    self.assertTrue(solver._beamTrimmed)
+    self.assertEqual(2, solver._beamDepth)
+    kept = sorted(map(watersort.BaseGame.getBeamScore, solver._q))
+    dropped = [game.getBeamScore() for game in games if game not in solver._q]
+    self.assertLessEqual(kept[-1], min(dropped))
+
+  def testNarrowBeamFindsNoShorterSolution(self):
+    for width, level in [(5, "112"), (1, "2023/dec8")]:
+      with self.subTest(width=width, level=level), mock.patch.object(watersort, "BEAM_WIDTH", width):
+        solver = search(level, "BEAM")
+        self.assertTrue(solver._beamTrimmed)
+        self.assertLessEqual(search(level, "BFS").minSolution._numMoves, solver.minSolution._numMoves)
+
+  def testWideBeamFindsShortestSolution(self):
+    for level in ShortestSolutionTest.LEVELS:
+      with self.subTest(level=level):
+        solver = search(level, "BEAM")
+        self.assertFalse(solver._beamTrimmed)
+        self.assertEqual(search(level, "BFS").minSolution._numMoves, solver.minSolution._numMoves)
+
+class MysterySpaceTest(unittest.TestCase):
+  def setUp(self):
+    pinned = pinSolveSettings()
+    pinned.start()
+    self.addCleanup(pinned.stop)
+  def tearDown(self):
+    watersort.Game.reset = False
+
+  def testFirstRevealStopsMoveGeneration(self):
+    # DFR switches to MIX at the first mystery space, so the second one must not ask the user
+    game = watersort.Game.Create([["?", "r", "g", "b"], ["?", "b", "g", "r"], ["r", "g", "b", "?"], ["-"] * 4, ["-"] * 4])
+    with contextlib.redirect_stdout(io.StringIO()):
+      watersort.setSolveMethod("DFR", suppressNotification=True)
+      with mock.patch.object(watersort.Game, "requestVal", side_effect=AssertionError("Asked the user for a value")):
+        self.assertEqual([], game.generateNextMoves())
+    self.assertTrue(watersort.Game.reset)
+
+class MoveOrderingTest(unittest.TestCase):
+  def testMergesRankAbovePoursIntoEmptyVials(self):
+    game = readLevel("110")
+    game = watersort.SearchNode(game._state, None, game).spawnNode((1, 9)) # Orange tops vial 9, and vial 10 is empty
+    moves = sorted(game.generateNextMoves(), key=game.getMovePromise)
+    merges = [move for move in moves if move[1] == 9]
+    self.assertEqual([(3, 9), (5, 9), (7, 9)], merges)
+    self.assertEqual(merges, moves[-len(merges):])
+
+  def testExplicitOrderingIgnoresShuffleSetting(self):
+    game = readLevel("110")
+    solver = QuietSolver(game)
+    solver._searchBFS = solver._searchAStar = False
+    generated = game.generateNextMoves()
+    with mock.patch.multiple(watersort, SOLVE_METHOD="DFS", SHUFFLE_NEXT_MOVES=True):
+      solver.moveOrdering = "GENERATED"
+      moves = list(generated)
+      solver._orderNextMoves(game, moves)
+      self.assertEqual(generated, moves)
+
+      solver.moveOrdering = None # Ranks by promise outside of DFR
+      moves = list(generated)
+      solver._orderNextMoves(game, moves)
+      self.assertCountEqual(generated, moves)
+      promises = [game.getMovePromise(move) for move in moves]
+      self.assertEqual(sorted(promises), promises)
+
+if __name__ == "__main__":
+  unittest.main()
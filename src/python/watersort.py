@@ -1,10 +1,13 @@
-import copy
+import hashlib
+import heapq
 import itertools
+import multiprocessing
 import os
 import random
 import signal
 import sys
 import threading
+from abc import ABC, abstractmethod
 from collections import deque, defaultdict
 from colorama import Fore
 from dataclasses import dataclass, field
@@ -12,7 +15,7 @@ from datetime import datetime
 from math import floor, log, ceil
 from resources import COLOR_CODES, COLOR_FOREGROUND, COLOR_NAMES, MONTH_ABBRS, RESERVED_COLORS, BigChar, BigShades, Style
 from time import time
-from typing import Callable, Literal
+from typing import Callable, Iterator, Literal
 
 USE_READCHAR = True
 if USE_READCHAR:
@@ -24,8 +27,8 @@ USE_BIG_MOVES = True
 INSTALLED_BASE_PATH = ""
 WRITE_FILES_TO_ABSOLUTE_PATH = False
 
-SOLVER_VERSION = 4
-ANALYZER_VERSION = 6
+SOLVER_VERSION = 5
+ANALYZER_VERSION = 7
 
 NUM_SPACES_PER_VIAL = 4
 DEBUG_ONLY = False
@@ -34,7 +37,7 @@ FORCE_INTERACTION_MODE = None # "a"
 
 
 SOLVE_METHOD = "DFR"
-VALID_SOLVE_METHODS = set(["MIX", "BFS", "DFS", "DFR"]) # An enum is more accurate, but overkill for this need
+VALID_SOLVE_METHODS = set(["MIX", "BFS", "DFS", "DFR", "ASTAR", "IDA", "BEAM"]) # An enum is more accurate, but overkill for this need
 VALID_GAMEPLAY_MODES = set(["drain", "blind"])
 
 MIX_SWITCH_THRESHOLD_MOVES = 10
@@ -43,6 +46,12 @@ ENABLE_QUEUE_CHECKS = True # Disable only for temporary testing
 SHUFFLE_NEXT_MOVES = False
 ANALYZE_ATTEMPTS = 10000
 DFR_SEARCH_ATTEMPTS = 200
+DFR_ATTEMPT_ITERATIONS = 500 # Iterations a DFR attempt may go without finding a shorter solution, once one is known
+SOLVE_WORKERS = 1 # Processes that share the DFR attempts, analysis samples, or each depth of a BFS. 0 uses every core
+DEAD_END_SEARCH_PROCESS = True # Counts the dead ends of the solution steps in a worker process, instead of the display's thread
+TRANSPOSITION_TABLE_SIZE = 4000000 # Most games remembered by each search attempt, and by the memory shared by DFR attempts
+IDA_TABLE_SIZE = 1000000 # Most games remembered by each IDA threshold
+BEAM_WIDTH = 1000 # Most games kept at each depth of a BEAM search
 
 CONFIRM_APPLY_LAST_UNKNOWN = False
 CONFIRM_APPLY_LAST_BATCH_COLOR = False
@@ -51,9 +60,24 @@ AUTO_BFS_FOR_UNKNOWNS_ORIG_METHOD = None
 FEW_VIALS_THRESHOLD = 5 # I'm not actually sure if this is the right threshold, but it appears correct
 
 Vials = list[list[str]]
+PackedVials = tuple[bytes, ...]
+""" One interned bytes object per vial, holding a color code per space from the top to the bottom """
+VialSummary = tuple[int, bool, bool, int, int]
+""" (topCode, isComplete, isOnlyColorInColumn, numOfColorOnTop, numEmptySpaces) """
+VialTransition = tuple[int, int, int, bool, bool, bool, bytes, bytes]
+""" (startCode, endCode, endEmptySpaces, willComplete, requireMaxSoloVial, breakFillTieByIndex, newStartVial, newEndVial) """
 Move = tuple[int, int]
 """ (startVialIndex, endVialIndex) """
 
+class VialCache(dict):
+  """Computes the entry of a vial the first time it is read, so the cache can be cleared at any time."""
+  def __init__(self, compute: Callable[[bytes], object]):
+    super().__init__()
+    self._compute = compute
+  def __missing__(self, vial: bytes):
+    value = self[vial] = self._compute(vial)
+    return value
+
 @dataclass(frozen=True)
 class DeadEndSearchResults:
   game: "Game"
@@ -63,12 +87,44 @@ class DeadEndSearchResults:
   numEventualSolutions: int
 
   searchDataAvailable: bool = True
+  isPartial: bool = False # Counting stopped at its limit of games, so there are at least this many
   generatedInstant: float = field(default_factory=time)
 
   @property
   def hasDeadEnds(self):
     return self.numDeadEnds>0
 
+@dataclass(frozen=True)
+class SolutionSummary:
+  """The parts of a solution the analysis reports on, without the games themselves."""
+  completionStr: str
+  numMoves: int
+  completionOrder: list[tuple[str, int]] # (color, depth)[]
+
+  def getDepth(self) -> int:
+    return self.numMoves
+
+@dataclass
+class WorkerResults:
+  """What one worker process found in its share of the attempts. Only the moves of its shortest solution are sent back."""
+  solutionMoves: list["Move"] | None
+  solutionsAttempted: int
+  minSolutionUpdates: int
+  numSolutionsAbandoned: int
+
+  # Since the worker's last reset
+  numIterations: int
+  numDeadEnds: int
+  numPartialSolutionsGenerated: int
+  numSwallowedGamesFound: int
+  numUniqueStatesComputed: int
+  numDuplicateGames: int
+  maxQueueLength: int
+
+  # Analysis summary data, merged into the main process
+  depthCounters: dict[str, dict[int, int]] # name -> depth -> count
+  solutions: list[tuple[int, SolutionSummary]] # (attemptNumber, summary)[]
+
 
 class SolutionStep:
   game: "Game"
@@ -117,16 +173,741 @@ class SolutionStep:
 
     self.isSameAsPrevious = None
 
-class Game:
-  vials: Vials
-  __numVials: int
+class BaseGame(ABC):
+  """The board and move history shared by interactive games and search nodes."""
+  __slots__ = ("_state", "_hash", "_soloVials", "_openVials", "move", "prev", "root", "_numMoves", "completionOrder")
+
+  _state: PackedVials
+  _hash: int # Zobrist hash of _state, independent of the order of the vials
+  _soloVials: dict[int, tuple[int, ...]] # color code -> ascending indices of vials holding only that color # Immutable
+  _openVials: tuple[int, ...] # Ascending indices of the vials that are not yet completed
   move: Move # The move applied to the parent that got us here
   _numMoves: int
-  __isRoot: bool
-  prev: "Game" # Original has no prev
+  prev: "BaseGame" # Original has no prev
   root: "Game"
   completionOrder: list[tuple[str, int]] # (color, depth)[] # Immutable
 
+  # Colors are interned to small codes shared by all games
+  EMPTY_CODE = 0
+  UNKNOWN_CODE = 1
+  _colorCodes: dict[str, int] = {"-": EMPTY_CODE, "?": UNKNOWN_CODE}
+  _colorNames: list[str] = ["-", "?"]
+  # The caches below only hold the vials of the current level, and are cleared when another level is created
+  # Random keys for each vial contents, summed together into a game's hash. Only vials with mystery spaces depend on their index.
+  _zobristKeys: dict["bytes|tuple[int, bytes]", int] = {}
+  # Every distinct vial contents is stored once, and shared by all games that contain it
+  _internedVials: dict[bytes, bytes] = {}
+  # Summaries of each vial, read from the top and from the bottom
+  _vialSummaries: dict[bytes, tuple["VialSummary", "VialSummary"]] = VialCache(lambda vial: (BaseGame._summarizeVial(vial), BaseGame._summarizeVial(vial, bottom=True)))
+  # Runs of each vial, and a bit for each known color it holds
+  _vialRuns: dict[bytes, tuple[int, int]] = VialCache(lambda vial: BaseGame._countRuns(vial))
+  # Moves between two vial contents, shared by every game and solve attempt
+  _transitions: dict[tuple[bytes, bytes, bool], "VialTransition|None"] = {}
+  ZOBRIST_MASK = (1 << 64) - 1
+
+  MoveInfo = tuple[str, int, bool, bool, bool]
+  """ (colorMoved, numMoved, isComplete, vacatedVial, startedVial) OR None """
+
+  def __init__(self, state: "PackedVials", move: "Move", prev: "BaseGame"):
+    self._state = state # Immutable, so it can be shared with the parent
+    if prev is not None and prev._state is state:
+      self._hash = prev._hash
+      self._soloVials = prev._soloVials
+      self._openVials = prev._openVials
+    else:
+      self._hash = BaseGame._computeHash(state)
+      self._soloVials = BaseGame._indexSoloVials(state)
+      self._openVials = BaseGame._indexOpenVials(state)
+    self.move = move
+    self.prev = prev
+
+    isRoot = prev is None
+    self.root = self if isRoot else prev.root
+    self._numMoves = 0 if isRoot else prev._numMoves + 1
+    self.completionOrder = list() if isRoot else prev.completionOrder
+
+  @abstractmethod
+  def materialize(self) -> "Game":
+    """Returns a full `Game` for this state, which supports the interactive features."""
+  @abstractmethod
+  def tryAccessVal(self, vialIndex, spaceIndex) -> str:
+    """Returns the color at this space, asking the user to reveal it when it is unknown."""
+
+  @staticmethod
+  def _internColor(color: str) -> int:
+    code = BaseGame._colorCodes.get(color)
+    if code is None:
+      code = len(BaseGame._colorNames)
+      BaseGame._colorCodes[color] = code
+      BaseGame._colorNames.append(color)
+    return code
+  @staticmethod
+  def _internVial(vial: bytes) -> bytes:
+    interned = BaseGame._internedVials.get(vial)
+    if interned is None:
+      interned = BaseGame._internedVials[vial] = vial
+    return interned
+  @staticmethod
+  def _clearLevelCaches() -> None:
+    """Forgets the vials of the previous level. Games still holding them are summarized again when read.
+    Color codes are kept, since the games of any level share them."""
+    BaseGame._zobristKeys.clear()
+    BaseGame._internedVials.clear()
+    BaseGame._vialSummaries.clear()
+    BaseGame._vialRuns.clear()
+    BaseGame._transitions.clear()
+  @staticmethod
+  def _packVials(vials: "Vials") -> "PackedVials":
+    return tuple(BaseGame._internVial(bytes(BaseGame._internColor(color) for color in vial)) for vial in vials)
+  @property
+  def vials(self) -> "Vials":
+    """Unpacks the board into new lists. Use `_setSpaces()` to change the board."""
+    names = BaseGame._colorNames
+    return [[names[code] for code in vial] for vial in self._state]
+  def _setSpaces(self, vialIndex: int, spaceIndex: int, colors: list[str]) -> None:
+    """Overwrites consecutive spaces of a vial, beginning at `spaceIndex`."""
+    vial = bytearray(self._state[vialIndex])
+    vial[spaceIndex:spaceIndex+len(colors)] = bytes(BaseGame._internColor(color) for color in colors)
+    state = list(self._state)
+    state[vialIndex] = BaseGame._internVial(bytes(vial))
+    self._replaceState(tuple(state))
+  def _replaceState(self, state: "PackedVials") -> None:
+    self._state = state
+    self._hash = BaseGame._computeHash(state)
+    self._soloVials = BaseGame._indexSoloVials(state)
+    self._openVials = BaseGame._indexOpenVials(state)
+
+  @staticmethod
+  def _canonicalVial(vialIndex: int, vial: bytes) -> bytes:
+    """Vials are interchangeable, except for those with mystery spaces which are resolved by position."""
+    return bytes([vialIndex]) + vial if BaseGame.UNKNOWN_CODE in vial else vial
+  @staticmethod
+  def _zobristKey(vialIndex: int, vial: bytes) -> int:
+    """Returns a random 64-bit key for this vial contents.
+    Keys are derived from the contents, so they are stable between runs and processes.
+    Completed vials are left out of the hash, the other vials already decide which colors they hold."""
+    zKey = (vialIndex, vial) if BaseGame.UNKNOWN_CODE in vial else vial
+    key = BaseGame._zobristKeys.get(zKey)
+    if key is None:
+      if BaseGame._isCompleteVial(vial):
+        key = BaseGame._zobristKeys[zKey] = 0
+      else:
+        digest = hashlib.blake2b(BaseGame._canonicalVial(vialIndex, vial), digest_size=8).digest()
+        key = BaseGame._zobristKeys[zKey] = int.from_bytes(digest, "little")
+    return key
+  @staticmethod
+  def _computeHash(state: "PackedVials") -> int:
+    out = 0
+    for vialIndex, vial in enumerate(state):
+      out += BaseGame._zobristKey(vialIndex, vial)
+    return out & BaseGame.ZOBRIST_MASK
+  def _getBlockedVial(self) -> int | None:
+    """The vial the next move may not pour from, since the previous move filled it.
+    Completed vials have no moves anyway, so they are never blocked."""
+    return BaseGame._getBlockedVialAfter(self._state, self.move)
+  @staticmethod
+  def _getBlockedVialAfter(state: "PackedVials", move: "Move|None") -> int | None:
+    """The `_getBlockedVial()` of a board without its game."""
+    if not move:
+      return None
+    blockedVial = move[1]
+    return None if BaseGame._isCompleteVial(state[blockedVial]) else blockedVial
+  def _getSearchHash(self) -> int:
+    """The hash of the board, combined with the blocked vial.
+    Permutations of a board may block different vials, and then they have different moves."""
+    blockedVial = self._getBlockedVial()
+    if blockedVial is None:
+      return self._hash
+    key = BaseGame._zobristKey(blockedVial, self._state[blockedVial])
+    rotatedKey = ((key << 1) | (key >> 63)) & BaseGame.ZOBRIST_MASK # Differs from the key the vial adds to the board
+    return (self._hash + rotatedKey) & BaseGame.ZOBRIST_MASK
+  def _canonicalForm(self) -> tuple[list[bytes], bytes | None]: # (sortedVials, blockedVial)
+    """The vials sorted into a standard order, so that permutations of the same game compare equal.
+    Completed vials are skipped, like in the hash. The blocked vial is kept by its contents."""
+    return BaseGame._canonicalizeState(self._state, self._getBlockedVial())
+  @staticmethod
+  def _canonicalizeState(state: "PackedVials", blockedVial: int | None) -> tuple[list[bytes], bytes | None]: # (sortedVials, blockedVial)
+    """The `_canonicalForm()` of a board without its game."""
+    sortedVials = sorted(BaseGame._canonicalVial(vialIndex, vial) for vialIndex, vial in enumerate(state) if not BaseGame._isCompleteVial(vial))
+    return (sortedVials, None if blockedVial is None else BaseGame._canonicalVial(blockedVial, state[blockedVial]))
+
+  def getNthParent(self, n: int) -> "BaseGame":
+    """Returns the nth-parent of the game, or None if n is greater than the number of parents."""
+    out = self
+    for _ in range(n):
+      if out.prev:
+        out = out.prev
+      else:
+        return None
+    return out
+  def getTopVialColor(self, vialIndex, bottom = False) -> str:
+    return BaseGame._colorNames[self._getTopVialCode(vialIndex, bottom=bottom)]
+  def _getTopVialCode(self, vialIndex, bottom = False) -> int:
+    vial = self._state[vialIndex]
+    iterator = range(NUM_SPACES_PER_VIAL)
+    if bottom: iterator = reversed(iterator)
+    for i in iterator:
+      code = vial[i]
+      if code == BaseGame.UNKNOWN_CODE:
+        return BaseGame._internColor(self.getColor(vialIndex, i))
+      elif code == BaseGame.EMPTY_CODE:
+        continue
+      else:
+        return code
+    return BaseGame.EMPTY_CODE
+
+  def getColor(self, vialIndex, spaceIndex):
+    val = BaseGame._colorNames[self._state[vialIndex][spaceIndex]]
+    if val != '?':
+      return val
+
+    rootVal = self.tryAccessVal(vialIndex, spaceIndex)
+    return rootVal or "?"
+  def getMoveInfo(self) -> MoveInfo|None:
+    if not self.move:
+      return None
+    start, end = self.move
+
+    colorMoved = self.getTopVialColor(end)
+    codeMoved = BaseGame._colorCodes[colorMoved]
+    _, _, numMoved, startEmptySpaces   = self.prev._countOnTop(codeMoved, start, bottom=self.root.drainMode)
+    complete, _, _, endEmptySpaces     = self._countOnTop(codeMoved, end)
+
+    vacatedVial = numMoved + startEmptySpaces == NUM_SPACES_PER_VIAL
+    startedVial = NUM_SPACES_PER_VIAL - numMoved == endEmptySpaces
+    return (colorMoved, numMoved, complete, vacatedVial, startedVial)
+  @staticmethod
+  def _countRuns(vial: bytes) -> tuple[int, int]: # (numRuns, colorMask)
+    """Counts the groups of adjacent colors in the vial. Mystery spaces are skipped, so they never add a run."""
+    numRuns = 0
+    colorMask = 0
+    lastColor = BaseGame.EMPTY_CODE
+    for color in vial:
+      if color == BaseGame.EMPTY_CODE or color == BaseGame.UNKNOWN_CODE:
+        continue
+      if color != lastColor:
+        numRuns += 1
+        colorMask |= 1 << color
+        lastColor = color
+    return (numRuns, colorMask)
+  def getMinRemainingMoves(self) -> int:
+    """A lower bound on the moves needed to finish this game.
+    A finished game holds a single run per color, and each move merges at most one run into another."""
+    numRuns = 0
+    colorMask = 0
+    for vial in self._state:
+      vialRuns, vialMask = BaseGame._vialRuns[vial]
+      numRuns += vialRuns
+      colorMask |= vialMask
+    return numRuns - colorMask.bit_count()
+  def getBeamScore(self) -> tuple[int, int, int]: # (minRemainingMoves, -numCompleteVials, -numEmptyVials)
+    """Ranks games in a beam search, where smaller scores are closer to a solution."""
+    numComplete = 0
+    numEmpty = 0
+    for vial in self._state:
+      topColor, isComplete, _, _, _ = BaseGame._vialSummaries[vial][0]
+      if topColor == BaseGame.EMPTY_CODE:
+        numEmpty += 1
+      elif isComplete:
+        numComplete += 1
+    return (self.getMinRemainingMoves(), -numComplete, -numEmpty)
+  def getMacroMove(self, moves: list["Move"], includeSoloPours=False) -> "Move|None":
+    """Returns a move that can be made without considering the others: the only valid move,
+    or optionally a pour onto a vial that holds only the same color."""
+    if len(moves) == 1:
+      return moves[0]
+    if not includeSoloPours or self.root.drainMode:
+      return None # The drained spaces may be needed at the bottom of their vial
+
+    for start, end in moves:
+      endColor, _, endOnlyColor, _, _ = self._getVialSummary(end)
+      startColor, _, startOnlyColor, _, _ = self._getVialSummary(start)
+      if endOnlyColor and not startOnlyColor and endColor == startColor:
+        return (start, end)
+    return None
+  def getMovePromise(self, move: "Move") -> tuple[bool, int, bool]: # (completesVial, numOnEndTop, vacatesVial)
+    """Ranks how much closer a move gets to a solution, where larger values are more promising."""
+    start, end = move
+    _, _, _, numMoved, _ = self._getVialSummary(start, bottom=self.root.drainMode)
+    startEmptySpaces = self._getVialSummary(start)[4]
+    endColor, _, _, numOnEndTop, _ = self._getVialSummary(end)
+    if endColor == BaseGame.EMPTY_CODE:
+      numOnEndTop = 0 # Pouring into an empty vial merges nothing
+    transition = self._prepareMove(start, end)
+    completesVial = transition is not None and transition[3]
+    return (completesVial, numOnEndTop, numMoved + startEmptySpaces == NUM_SPACES_PER_VIAL)
+  def isFinished(self) -> bool:
+    summaries = BaseGame._vialSummaries
+    state = self._state
+    for vialIndex in self._openVials:
+      topColor, isComplete, _, _, _ = summaries[state[vialIndex]][0]
+      if not isComplete or topColor == BaseGame.UNKNOWN_CODE:
+        return False
+
+    return True
+  def canMove(self, startVial, endVial) -> bool:
+    return self._prepareMove(startVial, endVial) is not None
+  def _prepareMove(self, startVial, endVial) -> "VialTransition|None":
+    """Returns how the move changes the two vials, or None when the move is not allowed in this game."""
+    if startVial == endVial:
+      return None # Can't move to the same place
+    if not self.root.drainMode and self.move and startVial == self.move[1] and endVial == self.move[0]:
+      return None # Can't simply undo the previous move
+
+    transitionKey = (self._state[startVial], self._state[endVial], bool(self.root.drainMode))
+    transition = BaseGame._transitions.get(transitionKey, False)
+    if transition is False:
+      transition, cacheable = self._computeTransition(startVial, endVial)
+      if cacheable:
+        BaseGame._transitions[transitionKey] = transition
+    if transition is None:
+      return None
+
+    # The remaining rules depend on the rest of the game
+    startColor, endColor, _, _, requireMaxSoloVial, breakFillTieByIndex, _, _ = transition
+    if endColor == BaseGame.EMPTY_CODE and self._findSoloVial(startColor, skipVial=startVial) is not None:
+      return None # Never occupy a new container when we already have one
+
+    if requireMaxSoloVial:
+      maxSoloVial = self._findSoloVial(startColor, skipVial=startVial)
+      if maxSoloVial is not None and endVial != maxSoloVial:
+        # When completing a vial, never move more spaces than necessary
+        # When vacating a vial, always prefer to move into an existing "only" vial
+        # When combining vials, always move into the vial with the most spaces already
+        return None
+
+    # Break ties of vial fill level by preferring vials towards the end of the list
+    if breakFillTieByIndex and startVial > endVial:
+      return None
+
+    # It's valid
+    return transition
+  def _computeTransition(self, startVial, endVial) -> tuple["VialTransition|None", bool]: # (transition, cacheable)
+    """Applies the rules that depend only on the contents of the two vials.
+    The result can be cached unless a mystery space on top had to be resolved."""
+    drainMode = self.root.drainMode
+    cacheable = BaseGame._vialSummaries[self._state[startVial]][bool(drainMode)][0] != BaseGame.UNKNOWN_CODE
+
+    # Verify core game mechanics
+    startColor, startIsComplete, startOnlyColor, startNumOnTop, startEmptySpaces = self._getVialSummary(startVial, bottom=drainMode)
+    if startColor == BaseGame.EMPTY_CODE or startColor == BaseGame.UNKNOWN_CODE:
+      return (None, cacheable) # Can only move an active color
+    cacheable = cacheable and BaseGame._vialSummaries[self._state[endVial]][0][0] != BaseGame.UNKNOWN_CODE
+    endColor, endIsComplete, endOnlyColor, endNumOnTop, endEmptySpaces = self._getVialSummary(endVial)
+    if endColor != BaseGame.EMPTY_CODE and endColor != startColor:
+      return (None, cacheable) # Can only place on the same color, or an empty space
+
+    # Verify the destination vial
+    if endEmptySpaces == 0:
+      return (None, cacheable) # End vial is full
+
+    # Verify that this vial isn't full
+    if startIsComplete:
+      return (None, cacheable) # Start is fully filled
+    if startNumOnTop > endEmptySpaces:
+      # CONSIDER: This may not actually be an invalid move
+      return (None, cacheable) # Only pour when it can all be received
+    if endColor == BaseGame.EMPTY_CODE and startOnlyColor:
+      return (None, cacheable) # Never occupy a new container when we already have one
+
+    # Prevent rules that lead to game-play backtracks
+    compareVialFillLevel = False
+    requireMaxSoloVial = False
+
+    if startNumOnTop == 1 and endNumOnTop == 1:
+      requireMaxSoloVial = True
+
+    if startOnlyColor and endOnlyColor:
+      compareVialFillLevel = True
+    elif startOnlyColor or endOnlyColor:
+      requireMaxSoloVial = True
+
+    # Avoid moving a large number of squares onto a small number of squares
+    if compareVialFillLevel and startNumOnTop > endNumOnTop:
+      return (None, cacheable)
+    breakFillTieByIndex = compareVialFillLevel and startNumOnTop == endNumOnTop
+
+    # It's valid
+    willComplete = endOnlyColor and startNumOnTop == endEmptySpaces
+    newStartVial, newEndVial = BaseGame._pour(self._state[startVial], self._state[endVial], startColor, endEmptySpaces, drainMode)
+    return ((startColor, endColor, endEmptySpaces, willComplete, requireMaxSoloVial, breakFillTieByIndex, newStartVial, newEndVial), cacheable)
+  @staticmethod
+  def _pour(fromVial: bytes, toVial: bytes, startColor: int, endSpaces: int, drainMode: bool) -> tuple[bytes, bytes]:
+    fromVial = bytearray(fromVial)
+    toVial = bytearray(toVial)
+
+    # Remove at most endSpaces colors from start
+    piecesMoved = 0
+    moveRange = endSpaces
+    startColors = 0
+    while piecesMoved < moveRange and piecesMoved < NUM_SPACES_PER_VIAL:
+      idx = NUM_SPACES_PER_VIAL-piecesMoved-1 if drainMode else piecesMoved
+      color = fromVial[idx]
+      if color == BaseGame.EMPTY_CODE:
+        moveRange += 1
+      elif color == startColor:
+        startColors += 1
+        fromVial[idx] = BaseGame.EMPTY_CODE
+      else:
+        break
+      piecesMoved += 1
+
+    # Shift down moved colors in drain mode
+    if drainMode:
+      for i in range(NUM_SPACES_PER_VIAL-1,-1,-1):
+        shiftFrom = i - piecesMoved
+        shiftColor = BaseGame.EMPTY_CODE if shiftFrom < 0 else fromVial[shiftFrom]
+        fromVial[i] = shiftColor
+
+    # Add the values back to endVial, from the bottom
+    i = NUM_SPACES_PER_VIAL - 1
+    moveRange = startColors
+    while i >= 0 and moveRange > 0:
+      color = toVial[i]
+      if color == BaseGame.EMPTY_CODE:
+        moveRange -= 1
+        toVial[i] = startColor
+      i -= 1
+
+    return (BaseGame._internVial(bytes(fromVial)), BaseGame._internVial(bytes(toVial)))
+  def _getVialSummary(self, vialIndex: int, bottom=False) -> "VialSummary":
+    """Reads the cached summary of the vial, resolving a mystery space on top when necessary."""
+    summary = BaseGame._vialSummaries[self._state[vialIndex]][bottom]
+    if summary[0] == BaseGame.UNKNOWN_CODE:
+      topColor = self._getTopVialCode(vialIndex, bottom=bottom)
+      summary = (topColor, *self._countOnTop(topColor, vialIndex, bottom=bottom))
+    return summary
+  @staticmethod
+  def _summarizeVial(vial: bytes, bottom=False) -> "VialSummary":
+    ordered = reversed(vial) if bottom else vial
+    topColor = next((color for color in ordered if color != BaseGame.EMPTY_CODE), BaseGame.EMPTY_CODE)
+    return (topColor, *BaseGame._countVial(topColor, vial, bottom=bottom))
+  def _countOnTop(self, topColor: int, vialIndex: int, bottom=False) -> tuple[bool, bool, int, int]: # (isComplete, isOnlyColorInColumn, numOfColorOnTop, numEmptySpaces)
+    return BaseGame._countVial(topColor, self._state[vialIndex], bottom=bottom)
+  # topColor SHOULD NOT be EMPTY_CODE or UNKNOWN_CODE
+  @staticmethod
+  def _countVial(topColor: int, vial: bytes, bottom=False) -> tuple[bool, bool, int, int]: # (isComplete, isOnlyColorInColumn, numOfColorOnTop, numEmptySpaces)
+    isComplete = True
+    onlyColor = True
+    emptySpaces = 0
+    numOnTop = 0
+
+    emptySpaceVal = 1 # We only want to count empty spaces that appear BEFORE colors
+
+    if bottom: vial = reversed(vial)
+    for color in vial:
+      if color == BaseGame.EMPTY_CODE:
+        emptySpaces += emptySpaceVal
+      if color != topColor:
+        isComplete = False
+        if color != BaseGame.EMPTY_CODE:
+          onlyColor = False
+          emptySpaceVal = 0
+      elif onlyColor:
+        numOnTop += 1
+
+    return (isComplete, onlyColor, numOnTop, emptySpaces)
+  def _findSoloVial(self, forColor: int, skipVial=None) -> int | None:
+    """Locates a vial that contains *only* the specified color.
+    If multiple vials exist, returns the index with the most spaces of the specified color.
+    If no vial exists, returns None."""
+    summaries = BaseGame._vialSummaries
+    vialIndex: int|None = None
+    spacesInVial: int|None = None
+    for searchVial in self._soloVials.get(forColor, ()):
+      if searchVial == skipVial: continue
+      numOnTop = summaries[self._state[searchVial]][0][3]
+      if vialIndex is None or numOnTop >= spacesInVial:
+        vialIndex = searchVial
+        spacesInVial = numOnTop
+    return vialIndex
+  @staticmethod
+  def _getSoloColor(vial: bytes) -> int | None:
+    """Returns the color when the vial contains *only* that color, otherwise None."""
+    topColor, _, isOnlyColor, numOnTop, _ = BaseGame._vialSummaries[vial][0]
+    if topColor == BaseGame.UNKNOWN_CODE or not isOnlyColor or numOnTop == 0:
+      return None
+    return topColor
+  @staticmethod
+  def _indexSoloVials(state: "PackedVials") -> dict[int, tuple[int, ...]]:
+    soloVials = defaultdict(tuple)
+    for vialIndex, vial in enumerate(state):
+      soloColor = BaseGame._getSoloColor(vial)
+      if soloColor is not None:
+        soloVials[soloColor] += (vialIndex,)
+    return dict(soloVials)
+  @staticmethod
+  def _isCompleteVial(vial: bytes) -> bool:
+    topColor, isComplete, _, _, _ = BaseGame._vialSummaries[vial][0]
+    return isComplete and topColor != BaseGame.EMPTY_CODE and topColor != BaseGame.UNKNOWN_CODE
+  @staticmethod
+  def _indexOpenVials(state: "PackedVials") -> tuple[int, ...]:
+    return tuple(vialIndex for vialIndex, vial in enumerate(state) if not BaseGame._isCompleteVial(vial))
+  @staticmethod
+  def _updateSoloVials(soloVials: dict[int, tuple[int, ...]], vialIndex: int, oldColor: int|None, newColor: int|None) -> None:
+    """Moves the vial to the entry of its new solo color. `soloVials` must be a copy owned by the caller."""
+    if oldColor == newColor:
+      return
+    if oldColor is not None:
+      remaining = tuple(i for i in soloVials[oldColor] if i != vialIndex)
+      if remaining: soloVials[oldColor] = remaining
+      else:         del soloVials[oldColor]
+    if newColor is not None:
+      soloVials[newColor] = tuple(sorted(soloVials.get(newColor, ()) + (vialIndex,)))
+
+  def applyMove(self, startVial, endVial) -> bool:
+    transition = self._prepareMove(startVial, endVial)
+    if transition is None:
+      return False
+    _, endColor, _, willComplete, _, _, newStartVial, newEndVial = transition
+
+    # Only the two touched vials change, the rest are shared with the parent
+    state = list(self._state)
+    state[startVial] = newStartVial
+    state[endVial] = newEndVial
+
+    # Only the two touched vials can join or leave the solo vial index
+    oldStartSolo, newStartSolo = BaseGame._getSoloColor(self._state[startVial]), BaseGame._getSoloColor(state[startVial])
+    oldEndSolo, newEndSolo = BaseGame._getSoloColor(self._state[endVial]), BaseGame._getSoloColor(state[endVial])
+    if oldStartSolo != newStartSolo or oldEndSolo != newEndSolo:
+      soloVials = self._soloVials.copy()
+      BaseGame._updateSoloVials(soloVials, startVial, oldStartSolo, newStartSolo)
+      BaseGame._updateSoloVials(soloVials, endVial, oldEndSolo, newEndSolo)
+      self._soloVials = soloVials
+
+    # Only the two touched vials change the hash
+    self._hash = (self._hash
+                  - BaseGame._zobristKey(startVial, self._state[startVial])
+                  + BaseGame._zobristKey(startVial, state[startVial])
+                  - BaseGame._zobristKey(endVial, self._state[endVial])
+                  + BaseGame._zobristKey(endVial, state[endVial])) & BaseGame.ZOBRIST_MASK
+    self._state = tuple(state)
+
+    # Track the completion order, completed vials never move again
+    if willComplete:
+      self._openVials = tuple(vialIndex for vialIndex in self._openVials if vialIndex != endVial)
+      self._registerCompletion(BaseGame._colorNames[endColor])
+
+    # Finish
+    return True
+  def _registerCompletion(self, completingColor: str) -> None:
+    newCompletions = self.completionOrder.copy()
+    newCompletions.append((completingColor, self._numMoves))
+    self.completionOrder = newCompletions
+
+  def spawnNode(self, move: Move) -> "SearchNode":
+    newNode = SearchNode(self._state, move, self)
+    newNode.applyMove(move[0], move[1])
+    return newNode
+  def generateNextNodes(self, moves: list[Move] = None) -> Iterator["SearchNode"]:
+    """Lazily spawns the children, so none are built after the caller stops iterating."""
+    for move in (self.generateNextMoves() if moves is None else moves):
+      yield self.spawnNode(move)
+  def generateNextMoves(self, pruneCommuting: bool = True) -> list[Move]:
+    moves = list()
+    numVials = len(self._state)
+
+    emptyValid = [True]*numVials
+    moveValid = [True]*numVials
+
+    if self.move:
+      # TODO: this only evaluates the most recent move,
+      # but the algorithm could have inserted another move in between.
+      # More generically, we need to ensure that we never make a move from
+      # a vial, if the vial it would move into hasn't changed since the
+      # starting vial was filled. (That's a lot more complicated.)
+      moveValid[self.move[1]] = False
+    commuting = self._getCommutingContext() if pruneCommuting else None
+
+    # Group the destinations by their top color, so each start only checks compatible vials
+    # Completed vials can neither give nor receive, so only the open vials are considered
+    drainMode = self.root.drainMode
+    openVials = self._openVials
+    # Reading a mystery space may ask the user, so stop as soon as one of them resets the search
+    startColors: dict[int, int] = {}
+    endColors: dict[int, int] = {} if drainMode else startColors
+    for vial in openVials:
+      startColors[vial] = self._getVialSummary(vial, bottom=drainMode)[0]
+      if Game.reset:
+        return list()
+      if drainMode:
+        endColors[vial] = self._getVialSummary(vial)[0]
+        if Game.reset:
+          return list()
+
+    emptyEnds: list[int] = []
+    endsByColor: defaultdict[int, list[int]] = defaultdict(list)
+    for end, endColor in endColors.items():
+      if endColor == BaseGame.EMPTY_CODE:
+        emptyEnds.append(end)
+      elif endColor != BaseGame.UNKNOWN_CODE:
+        endsByColor[endColor].append(end)
+
+    # We hope to restrict some moves that are legally valid, but expand the search space unnecessarily
+    # Only allow each move to end up in the first empty vial, other empty vials are not allowed
+    # If there are two ways to complete a vial, only allow the first way
+    # CONSIDER: If this vial can move into a vial that already has only this color in it (but is not empty),
+    # That should be the only valid move for this vial
+    for start in openVials:
+      # We already decided that this vial doesn't have any legal moves
+      if not moveValid[start]:
+        continue
+
+      startColor = startColors[start]
+      if startColor == BaseGame.EMPTY_CODE or startColor == BaseGame.UNKNOWN_CODE:
+        continue
+
+      # Visit the ends in order, so the first empty vial and completions are chosen as before
+      ends = endsByColor.get(startColor, [])
+      if emptyEnds:
+        ends = sorted(ends + emptyEnds)
+
+      for end in ends:
+        transition = self._prepareMove(start, end)
+
+        # Obviously, this isn't a valid move
+        if transition is None:
+          continue
+        _, endColor, _, willComplete, _, _, _, _ = transition
+
+        # Only allow the first move into an empty vial from a given start vial
+        if endColor == BaseGame.EMPTY_CODE:
+          if emptyValid[start]:
+            emptyValid[start] = False
+          else:
+            continue
+        elif willComplete:
+          # If there is a move that will complete a color in a vial, then moving from that vial
+          # is never valid. Either, it would attempt to complete the other direction OR  it would
+          # only move into an empty vial. Obviously, there are no other colors for it to land on.
+          moveValid[end] = False
+
+        # Independent moves reach the same game in either order, so only explore them in ascending order
+        if commuting and (start, end) < commuting[0] and self._commutesWithPrevious(start, end, transition, commuting):
+          continue
+
+        # Fine, it's valid
+        moves.append((start, end))
+
+    return moves
+  def isDeadEnd(self, nextMoves: list[Move]) -> bool:
+    """Whether the game has no moves, given the moves generated for it.
+    Pruning commuting moves can leave a game without moves of its own, since the other order explores them."""
+    return not nextMoves and (self._getCommutingContext() is None or not self.generateNextMoves(pruneCommuting=False))
+  def _getCommutingContext(self) -> tuple["Move", int, set[int], "Move|None"] | None: # (move, colorMoved, affectedColors, parentMove)
+    """Describes the move that led here, when later moves might be swapped before it."""
+    if not self.move or not self.prev:
+      return None
+    if self.root.drainMode:
+      # Draining from the vial that was just filled is not allowed, even though it moves other spaces.
+      # Depending on the previous move, that can block the swapped order, so every order is kept.
+      return None
+    prev = self.prev
+    start, end = self.move
+    oldStart, oldEnd = prev._state[start], prev._state[end]
+    if BaseGame._vialSummaries[oldEnd][0][0] == BaseGame.EMPTY_CODE:
+      return None # Which empty vial gets filled depends on the other vials
+
+    colorMoved = BaseGame._vialSummaries[oldStart][0][0]
+    affected = BaseGame._getColorsAffectedByMove(colorMoved, oldStart, oldEnd, self._state[start], self._state[end])
+    if affected is None:
+      return None
+    return (self.move, colorMoved, affected, prev.move)
+  def _commutesWithPrevious(self, start: int, end: int, transition: "VialTransition", commuting: tuple["Move", int, set[int], "Move|None"]) -> bool:
+    """Whether this move was also allowed before the previous move, and allows it again afterwards.
+    Both orders then reach the same game in the same number of moves."""
+    (prevStart, prevEnd), prevColorMoved, prevAffected, parentMove = commuting
+    if start == prevStart or start == prevEnd or end == prevStart or end == prevEnd:
+      return False
+    if parentMove and start == parentMove[1]:
+      return False # The parent never moves from the vial it just filled
+
+    colorMoved, endColor, _, willComplete, _, _, newStartVial, newEndVial = transition
+    if endColor == BaseGame.EMPTY_CODE or colorMoved in prevAffected:
+      return False
+    # Each order blocks the vial filled by its last move, so both must block the same contents
+    blockedHere = None if willComplete else newEndVial
+    prevEndVial = self._state[prevEnd]
+    blockedOther = None if BaseGame._isCompleteVial(prevEndVial) else prevEndVial
+    if blockedHere != blockedOther:
+      return False
+    affected = BaseGame._getColorsAffectedByMove(colorMoved, self._state[start], self._state[end], newStartVial, newEndVial)
+    return affected is not None and prevColorMoved not in affected
+  @staticmethod
+  def _getColorsAffectedByMove(colorMoved: int, oldStart: bytes, oldEnd: bytes, newStart: bytes, newEnd: bytes) -> set[int] | None:
+    """The colors whose moves may be judged differently after this move, or None when mystery spaces are involved."""
+    vials = (oldStart, oldEnd, newStart, newEnd)
+    if any(BaseGame.UNKNOWN_CODE in vial for vial in vials):
+      return None
+    affected = {colorMoved, BaseGame._vialSummaries[newStart][0][0]}
+    for vial in vials:
+      soloColor = BaseGame._getSoloColor(vial)
+      if soloColor is not None:
+        affected.add(soloColor)
+    return affected
+
+  def __str__(self) -> str:
+    names = BaseGame._colorNames
+    return " ".join(names[code] for code in itertools.chain.from_iterable(self._state))
+  def __eq__(self, other: object) -> bool:
+    """Games are equal when they are the same up to the order of the vials, and block the same vial."""
+    if isinstance(other, BaseGame):
+      if self._getSearchHash() != other._getSearchHash():
+        return False
+      if self._state == other._state and self._getBlockedVial() == other._getBlockedVial():
+        return True
+      # Each arrangement of a finished game is still reported as a distinct solution
+      return not self.isFinished() and self._canonicalForm() == other._canonicalForm()
+    return False
+  def __hash__(self) -> int:
+    return self._getSearchHash()
+
+  def _getCompletionStr(self) -> str:
+    return " ".join(map(lambda x: x[0], self.completionOrder))
+  def _completion_eq(self, other: object) -> bool:
+    if isinstance(other, BaseGame):
+      return self._getCompletionStr() == other._getCompletionStr()
+    return False
+  def _completion_hash(self) -> int:
+    return hash(self._getCompletionStr())
+
+  def getNumVials(self) -> int:
+    return len(self._state)
+  def getDepth(self) -> int:
+    return self._numMoves
+  def getMovesFromRoot(self) -> list[Move]:
+    moves = list()
+    game = self
+    while game.prev:
+      moves.append(game.move)
+      game = game.prev
+    moves.reverse()
+    return moves
+
+class SearchNode(BaseGame):
+  """A light-weight game state explored by the solvers. Only solutions, and nodes that need user input, become a full `Game`."""
+  __slots__ = ()
+
+  def materialize(self) -> "Game":
+    nodes: list[SearchNode] = []
+    game = self
+    while isinstance(game, SearchNode):
+      nodes.append(game)
+      game = game.prev
+
+    for node in reversed(nodes):
+      game = Game(node._state, node.move, game)
+      game.completionOrder = node.completionOrder
+    return game
+  def tryAccessVal(self, vialIndex, spaceIndex) -> str:
+    val = BaseGame._colorNames[self.root._state[vialIndex][spaceIndex]]
+    if val != "?":
+      return val
+    return self.materialize().tryAccessVal(vialIndex, spaceIndex)
+
+class Game(BaseGame):
+  """A game the user interacts with. Solvers explore with light-weight `SearchNode`s, and only materialize games when needed."""
+
   # Flags set on the static class
   # TODO: Move these static fields to the Solver class instead
   reset: bool = False
@@ -171,33 +952,20 @@ class Game:
 
   @staticmethod
   def Create(vials, drainMode=False, blindMode=False) -> "Game":
-    newGame = Game(vials, None, None)
+    BaseGame._clearLevelCaches()
+    newGame = Game(Game._packVials(vials), None, None)
     newGame.drainMode = bool(drainMode)
     newGame.blindMode = bool(blindMode)
     newGame._analyzeColors()
     return newGame
 
-  def __init__(self, vials: "Vials", move: "Move", prev: "Game", modified = False):
-    self.vials = copy.deepcopy(vials)
-    self.__numVials = len(vials)
-    self.move = move
-    self.prev = prev
+  def __init__(self, state: "PackedVials", move: "Move", prev: "BaseGame", modified = False):
+    super().__init__(state, move, prev)
     self.modified = modified
 
-    self.__isRoot = prev is None
-    self.root = self if self.__isRoot else prev.root
-    self._numMoves = 0 if self.__isRoot else prev._numMoves + 1
-    self.completionOrder = list() if self.__isRoot else prev.completionOrder
+  def materialize(self) -> "Game":
+    return self
 
-  def getNthParent(self, n: int) -> "Game":
-    """Returns the nth-parent of the game, or None if n is greater than the number of parents."""
-    out = self
-    for _ in range(n):
-      if out.prev:
-        out = out.prev
-      else:
-        return None
-    return out
   def hasError(self) -> bool:
     return self._colorError # Or other errors
   def attemptCorrectErrors(self) -> bool:
@@ -216,30 +984,9 @@ class Game:
       print("Issues resolved. Proceeding.")
       return False
 
-  def getTopVialColor(self, vialIndex, bottom = False) -> str:
-    vial = self.vials[vialIndex]
-    iterator = range(NUM_SPACES_PER_VIAL)
-    if bottom: iterator = reversed(iterator)
-    for i in iterator:
-      val = vial[i]
-      if val == '?':
-        return self.getColor(vialIndex, i)
-      elif val == '-':
-        continue
-      else:
-        return val
-    return "-"
-
-  def getColor(self, vialIndex, spaceIndex):
-    val = self.vials[vialIndex][spaceIndex]
-    if val != '?':
-      return val
-
-    rootVal = self.tryAccessVal(vialIndex, spaceIndex)
-    return rootVal or "?"
   def tryAccessVal(self, vialIndex, spaceIndex) -> str:
     root = self.root
-    val = root.vials[vialIndex][spaceIndex]
+    val = Game._colorNames[root._state[vialIndex][spaceIndex]]
     if val != "?":
       return val
 
@@ -278,8 +1025,8 @@ class Game:
         if spaceIndex + len(spaces) > NUM_SPACES_PER_VIAL:
           print(formatVialColor("er", "Too many colors.") + f" Multiple colors can be entered, but the total number of spaces cannot exceed {NUM_SPACES_PER_VIAL}.")
           continue # Reprompt the user
-        root.vials[vialIndex][spaceIndex:spaceIndex+len(spaces)] = spaces
-        self.vials[vialIndex][spaceIndex:spaceIndex+len(spaces)] = spaces
+        root._setSpaces(vialIndex, spaceIndex, spaces)
+        self._setSpaces(vialIndex, spaceIndex, spaces)
       break
 
     colorDist, colorErrors = root._analyzeColors()
@@ -301,8 +1048,8 @@ class Game:
         print(request)
 
       if proceed:
-        root.vials[lastVialIndex][lastVialSpace] = lastColor
-        self.vials[lastVialIndex][lastVialSpace] = lastColor
+        root._setSpaces(lastVialIndex, lastVialSpace, [lastColor])
+        self._setSpaces(lastVialIndex, lastVialSpace, [lastColor])
         rootChanged = True
     elif colorDist["?"] <= NUM_SPACES_PER_VIAL and len(underusedColors) == 1:
       lastColor = underusedColors[0]
@@ -317,10 +1064,10 @@ class Game:
         print(request)
 
       if proceed:
-        for vialIdx, spaceIdx in itertools.product(range(self.__numVials), range(NUM_SPACES_PER_VIAL)):
-          if root.vials[vialIdx][spaceIdx] == "?":
-            root.vials[vialIdx][spaceIdx] = lastColor
-            self.vials[vialIdx][spaceIdx] = lastColor
+        for vialIdx, spaceIdx in itertools.product(range(len(self._state)), range(NUM_SPACES_PER_VIAL)):
+          if root._state[vialIdx][spaceIdx] == Game.UNKNOWN_CODE:
+            root._setSpaces(vialIdx, spaceIdx, [lastColor])
+            self._setSpaces(vialIdx, spaceIdx, [lastColor])
 
 
     if rootChanged:
@@ -426,7 +1173,10 @@ class Game:
     elif rsp.startswith("-b "):
       self.saveNewBigMovesSetting(rsp, self)
     elif rsp.startswith("-solve"):
-      setSolveMethod(rsp.split(" ")[1])
+      args = rsp.split(" ")
+      setSolveMethod(args[1])
+      if len(args) > 2 and SOLVE_METHOD == "BEAM":
+        setBeamWidth(args[2])
       Game.reset = True
       return ""  # Immediately return to re-solve
     elif rsp.startswith("-gameplay"):
@@ -464,6 +1214,7 @@ class Game:
             "   -b on|off|ON            Enable/disable Big Moves by default. Specify ON (all-caps) to skip launching routine.\n" +
            f"   -gameplay MODE          to toggle other forms of gameplay ({', '.join(VALID_GAMEPLAY_MODES)})\n" +
            f"   -solve METHOD           to change the solve method ({', '.join(VALID_SOLVE_METHODS)})\n" +
+            "   -solve BEAM WIDTH       to keep WIDTH games at each depth of the search\n" +
             "   -level NUM              to change the level of this game\n" +
             "   -vials NUM              to change the number of vials in the game\n" +
             "   -e or -exit             to save and exit\n" +
@@ -505,8 +1256,8 @@ class Game:
     space = int(o_space) - 1 # Assumes a valid integer
     Game.reset = True
     self.root.modified = True
-    self.root.vials[vial][space] = color
-    self.vials[vial][space] = color
+    self.root._setSpaces(vial, space, [color])
+    self._setSpaces(vial, space, [color])
     print(f"Saved color '{color}' to vial {o_vial} in slot {o_space}. Continue on.")
   def saveNewLevel(self, input: str) -> None:
     flag, o_level = input.split()
@@ -519,20 +1270,19 @@ class Game:
     numVials = int(o_vials) # Assumes a valid integer
 
     target = self.root
-    if numVials > len(target.vials):
+    if numVials > len(target._state):
       target.modified = True
       Game.reset = True
-      while numVials > len(target.vials):
-        target.vials.append(["-"] * NUM_SPACES_PER_VIAL)
+      emptyVial = Game._internVial(bytes([Game.EMPTY_CODE] * NUM_SPACES_PER_VIAL))
+      target._replaceState(target._state + (emptyVial,) * (numVials - len(target._state)))
       print(f"Increased number of vials to {numVials}")
-    elif numVials < len(target.vials):
+    elif numVials < len(target._state):
       target.modified = True
       Game.reset = True
-      target.vials = target.vials[0:numVials]
+      target._replaceState(target._state[0:numVials])
       print(f"Truncated the vials to only the first {numVials}")
     else:
       print(f"No change to number of vials. Still have {numVials}")
-    target.__numVials = numVials
   @staticmethod
   def _identifyUnderusedColors(colorDist: dict[str, int]) -> list[str]:
     return [color for color, count in colorDist.items() if count < NUM_SPACES_PER_VIAL and color != "?"]
@@ -542,9 +1292,6 @@ class Game:
     """
     return next(((vialIndex, spaceIndex) for vialIndex, vial in enumerate(self.vials) for spaceIndex, val in enumerate(vial) if val == color), None)
 
-  MoveInfo = tuple[str, int, bool, bool, bool]
-  """ (colorMoved, numMoved, isComplete, vacatedVial, startedVial) OR None """
-
   def printMoves(self, fromGame: "Game" = None) -> None:
     """Prints out the moves taken to reach this game state."""
     steps: deque[SolutionStep] = self._prepareSolutionSteps(fromGame)
@@ -578,7 +1325,7 @@ class Game:
     curGame = self
     moves = deque()
     while curGame and curGame.move:
-      if curGame == fromGame:
+      if curGame is fromGame:
         return steps # Skip comparison against previous prints
 
       moves.appendleft(curGame.move)
@@ -609,349 +1356,98 @@ class Game:
 
     print("\n".join(lines))
 
-  def getMoveString(self, step: SolutionStep) -> str:
-    """Returns a string with a fixed justification, including escape character for formatting, that describes the move."""
-    start, end = step.move
-    result = formatVialColor(step.colorMoved, f"{start+1}->{end+1}", ljust=8)
-    result += self._getMoveInfoString(step.info)
-    return result
-  def _getMoveInfoString(self, info: MoveInfo) -> str:
-    if info is None:
-      return ""
-
-    color, num, complete, vacated, startedVial = info
-    extraStr = ""
-    if complete:
-      extraStr = Game.COMPLETE_STR
-    elif vacated:
-      extraStr = Game.VACATED_STR
-    elif startedVial:
-      extraStr = Game.STARTED_STR
-
-    numStr = Style.BRIGHT + str(num) + Style.NORMAL if num > 1 else num
-    if extraStr: extraStr = " " + extraStr
-    result = f"({numStr} {color}{extraStr})"
-
-    return result.ljust(Game.TOTAL_MOVE_PRINT_WIDTH)
-  def getMoveInfo(self) -> MoveInfo|None:
-    if not self.move:
-      return None
-    start, end = self.move
-
-    colorMoved = self.getTopVialColor(end)
-    _, _, numMoved, startEmptySpaces   = self.prev.__countOnTop(colorMoved, start, bottom=self.root.drainMode)
-    complete, _, _, endEmptySpaces     = self.__countOnTop(colorMoved, end)
-
-    vacatedVial = numMoved + startEmptySpaces == NUM_SPACES_PER_VIAL
-    startedVial = NUM_SPACES_PER_VIAL - numMoved == endEmptySpaces
-    return (colorMoved, numMoved, complete, vacatedVial, startedVial)
-  def printVials(self, numberSpaces=False) -> None:
-    lines = [list() for _ in range(NUM_SPACES_PER_VIAL + 1)]
-
-    if numberSpaces:
-      for lineIndex in range(NUM_SPACES_PER_VIAL + 1):
-        lines[lineIndex].append(" " if lineIndex==0 else str(lineIndex))
-
-    for i in range(self.__numVials):
-      lines[0].append("\t" + str(i + 1))
-
-    color: str = None
-    for spaceIndex in range(NUM_SPACES_PER_VIAL):
-      for vialIndex in range(self.__numVials):
-        color = self.vials[vialIndex][spaceIndex]
-        lines[spaceIndex + 1].append("\t" + formatVialColor(color, text=color))
-
-    print("\n".join(["".join(line) for line in lines]))
-
-  def printColors(self, analyzedData = None) -> list[str]:
-    """Prints out the state of the colors, including any errors"""
-    lines = []
-    countColors, errors = analyzedData if analyzedData else self._analyzeColors()
-
-    lines.append("Frequency of colors:")
-    for color, count in sorted(countColors.items()):
-      if color == "-": continue
-      label = "\t"
-      if color != "?" and count != NUM_SPACES_PER_VIAL:
-        label += "(too many)" if count > NUM_SPACES_PER_VIAL else "(too few)"
-      lines.append(f"  {formatVialColor(color, text=color)}: \t{count}" + label)
-
-    if len(errors):
-      lines.append("\nErrors:")
-      for error in errors:
-        lines.append("  " + error)
-
-    print("\n".join(lines))
-  def _analyzeColors(self) -> tuple[dict[str, int], list[str]]: # (dict[color, occurrences], list[error strings])
-
-    # Analyze the colors represented
-    countColors = defaultdict(int)
-    for vial, space in itertools.product(self.vials, range(NUM_SPACES_PER_VIAL)):
-      countColors[vial[space]] += 1
-
-    errors = list()
-    hasUnknowns = countColors["?"] == 0
-    for color, count in countColors.items():
-      if color == "?" or color == "-":
-        continue
-
-      if count > NUM_SPACES_PER_VIAL:
-        errors.append(f"Color '{color}' appears too many times ({count})!")
-      elif count < NUM_SPACES_PER_VIAL and hasUnknowns:
-        errors.append(f"Color '{color}' appears too few times ({count})!")
-
-    self.root._hasUnknowns = hasUnknowns
-    self.root._colorError = len(errors) > 0
-    return (countColors, errors)
-
-
-  def isFinished(self) -> bool:
-    for vial in self.vials:
-      c0 = vial[0]
-      for c in vial:
-        if c == "?":  return False
-        if c != c0:   return False
-
-    return True
-  def canMove(self, startVial, endVial) -> bool:
-    return self.__prepareMove(startVial, endVial)[0]
-  def __prepareMove(self, startVial, endVial) -> tuple[bool, str, str, int, bool]: # (valid, startColor, endColor, endSpace, willComplete)
-    INVALID_MOVE = (False, None, None, None, False)
-    if startVial == endVial:
-      return INVALID_MOVE # Can't move to the same place
-    if not self.root.drainMode and self.move and startVial == self.move[1] and endVial == self.move[0]:
-      return INVALID_MOVE # Can't simply undo the previous move
-
-    # Verify core game mechanics
-    startColor = self.getTopVialColor(startVial, bottom=self.root.drainMode)
-    if startColor == "-" or startColor == "?":
-      return INVALID_MOVE # Can only move an active color
-    endColor = self.getTopVialColor(endVial)
-    if endColor != "-" and endColor != startColor:
-      return INVALID_MOVE # Can only place on the same color, or an empty space
-
-    # Verify the destination vial
-    endIsComplete, endOnlyColor, endNumOnTop, endEmptySpaces = self.__countOnTop(endColor, endVial)
-    if endEmptySpaces == 0:
-      return INVALID_MOVE # End vial is full
-
-    # Verify that this vial isn't full
-    startIsComplete, startOnlyColor, startNumOnTop, startEmptySpaces = self.__countOnTop(startColor, startVial, bottom=self.root.drainMode)
-    if startIsComplete:
-      return INVALID_MOVE # Start is fully filled
-    if startNumOnTop > endEmptySpaces:
-      # CONSIDER: This may not actually be an invalid move
-      return INVALID_MOVE # Only pour when it can all be received
-    if endColor == "-" and (startOnlyColor or self.__findSoloVial(startColor, skipVial=startVial) is not None):
-      return INVALID_MOVE # Never occupy a new container when we already have one
-
-    # Prevent rules that lead to game-play backtracks
-    compareVialFillLevel = False
-    requireMaxSoloVial = False
-
-    if startNumOnTop == 1 and endNumOnTop == 1:
-      requireMaxSoloVial = True
-
-    if startOnlyColor and endOnlyColor:
-      compareVialFillLevel = True
-    elif startOnlyColor or endOnlyColor:
-      requireMaxSoloVial = True
-
-    if requireMaxSoloVial:
-      maxSoloVial = self.__findSoloVial(startColor, skipVial=startVial)
-      if maxSoloVial is not None and endVial != maxSoloVial:
-        # When completing a vial, never move more spaces than necessary
-        # When vacating a vial, always prefer to move into an existing "only" vial
-        # When combining vials, always move into the vial with the most spaces already
-        return INVALID_MOVE
-
-    # Avoid moving a large number of squares onto a small number of squares
-    # Break ties by preferring vials towards the end of the list
-    if compareVialFillLevel:
-      startCompVal = startNumOnTop + (startVial / 1000)
-      endCompVal = endNumOnTop + (endVial / 1000)
-      if startCompVal > endCompVal:
-        return INVALID_MOVE
-
-    # It's valid
-    willComplete = endOnlyColor and startNumOnTop == endEmptySpaces
-    return (True, startColor, endColor, endEmptySpaces, willComplete)
-  # topColor SHOULD NOT be "-" or "?"
-  def __countOnTop(self, topColor: str, vialIndex: int, bottom=False) -> tuple[bool, bool, int, int]: # (isComplete, isOnlyColorInColumn, numOfColorOnTop, numEmptySpaces)
-    isComplete = True
-    onlyColor = True
-    emptySpaces = 0
-    numOnTop = 0
-
-    vial = self.vials[vialIndex]
-    emptySpaceVal = 1 # We only want to count empty spaces that appear BEFORE colors
-
-    iterator=range(NUM_SPACES_PER_VIAL)
-    if bottom: iterator=reversed(iterator)
-    for i in iterator:
-      color = vial[i]
-      if color == "-":
-        emptySpaces += emptySpaceVal
-      if color != topColor:
-        isComplete = False
-        if color != "-":
-          onlyColor = False
-          emptySpaceVal = 0
-      elif onlyColor:
-        numOnTop += 1
-
-    return (isComplete, onlyColor, numOnTop, emptySpaces)
-  def __findSoloVial(self, forColor: str, skipVial=None) -> int | None:
-    """Locates a vial that contains *only* the specified color.
-    If multiple vials exist, returns the index with the most spaces of the specified color.
-    If no vial exists, returns None."""
-    vialIndex: int|None = None
-    spacesInVial: int|None = None
-    for searchVial in range(len(self.vials)):
-      if searchVial == skipVial: continue
-      _, isOnlyColor, numOnTop, _ = self.__countOnTop(forColor, searchVial)
-      if isOnlyColor and numOnTop > 0:
-        if vialIndex is None or numOnTop >= spacesInVial:
-          vialIndex = searchVial
-          spacesInVial = numOnTop
-    return vialIndex
-
-  def applyMove(self, startVial, endVial) -> bool:
-    valid, startColor, endColor, endSpaces, willComplete = self.__prepareMove(startVial, endVial)
-    if not valid:
-      return False
-
-    fromVial = self.vials[startVial]
-    toVial = self.vials[endVial]
-
-    # Remove at most endSpaces colors from start
-    piecesMoved = 0
-    moveRange = endSpaces
-    startColors = 0
-    while piecesMoved < moveRange and piecesMoved < NUM_SPACES_PER_VIAL:
-      idx = NUM_SPACES_PER_VIAL-piecesMoved-1 if self.root.drainMode else piecesMoved
-      color = fromVial[idx]
-      if color == '-':
-        moveRange += 1
-      elif color == startColor:
-        startColors += 1
-        fromVial[idx] = "-"
-      else:
-        break
-      piecesMoved += 1
+  def getMoveString(self, step: SolutionStep) -> str:
+    """Returns a string with a fixed justification, including escape character for formatting, that describes the move."""
+    start, end = step.move
+    result = formatVialColor(step.colorMoved, f"{start+1}->{end+1}", ljust=8)
+    result += self._getMoveInfoString(step.info)
+    return result
+  def _getMoveInfoString(self, info: "BaseGame.MoveInfo") -> str:
+    if info is None:
+      return ""
 
-    # Shift down moved colors in drain mode
-    if self.root.drainMode:
-      for i in range(NUM_SPACES_PER_VIAL-1,-1,-1):
-        shiftFrom = i - piecesMoved
-        shiftColor = "-" if shiftFrom < 0 else fromVial[shiftFrom]
-        fromVial[i] = shiftColor
+    color, num, complete, vacated, startedVial = info
+    extraStr = ""
+    if complete:
+      extraStr = Game.COMPLETE_STR
+    elif vacated:
+      extraStr = Game.VACATED_STR
+    elif startedVial:
+      extraStr = Game.STARTED_STR
 
-    # Add the values back to endVial, from the bottom
-    i = NUM_SPACES_PER_VIAL - 1
-    moveRange = startColors
-    while i >= 0 and moveRange > 0:
-      color = toVial[i]
-      if color == '-':
-        moveRange -= 1
-        toVial[i] = startColor
-      i -= 1
+    numStr = Style.BRIGHT + str(num) + Style.NORMAL if num > 1 else num
+    if extraStr: extraStr = " " + extraStr
+    result = f"({numStr} {color}{extraStr})"
 
-    # Track the completion order
-    if willComplete:
-      self.__registerCompletion(endColor)
+    return result.ljust(Game.TOTAL_MOVE_PRINT_WIDTH)
+  def printVials(self, numberSpaces=False) -> None:
+    lines = [list() for _ in range(NUM_SPACES_PER_VIAL + 1)]
 
-    # Finish
-    return True
-  def __registerCompletion(self, completingColor: str) -> None:
-    newCompletions = self.completionOrder.copy()
-    newCompletions.append((completingColor, self._numMoves))
-    self.completionOrder = newCompletions
+    if numberSpaces:
+      for lineIndex in range(NUM_SPACES_PER_VIAL + 1):
+        lines[lineIndex].append(" " if lineIndex==0 else str(lineIndex))
 
-  def spawn(self, move: Move) -> "Game":
-    newGame = Game(self.vials, move, self)
-    newGame.applyMove(move[0], move[1])
-    return newGame
+    for i in range(len(self._state)):
+      lines[0].append("\t" + str(i + 1))
 
-  def generateNextGames(self) -> list["Game"]:
-    return [self.spawn(move) for move in self.generateNextMoves()]
-  def generateNextMoves(self) -> list[Move]:
-    moves = list()
+    vials = self.vials
+    color: str = None
+    for spaceIndex in range(NUM_SPACES_PER_VIAL):
+      for vialIndex in range(len(self._state)):
+        color = vials[vialIndex][spaceIndex]
+        lines[spaceIndex + 1].append("\t" + formatVialColor(color, text=color))
 
-    emptyValid = [True]*self.__numVials
-    moveValid = [True]*self.__numVials
+    print("\n".join(["".join(line) for line in lines]))
 
-    if self.move:
-      # TODO: this only evaluates the most recent move,
-      # but the algorithm could have inserted another move in between.
-      # More generically, we need to ensure that we never make a move from
-      # a vial, if the vial it would move into hasn't changed since the
-      # starting vial was filled. (That's a lot more complicated.)
-      moveValid[self.move[1]] = False
+  def printColors(self, analyzedData = None) -> list[str]:
+    """Prints out the state of the colors, including any errors"""
+    lines = []
+    countColors, errors = analyzedData if analyzedData else self._analyzeColors()
 
-    for start, end in itertools.product(range(self.__numVials), range(self.__numVials)):
-      if Game.reset:
-        return list()
+    lines.append("Frequency of colors:")
+    for color, count in sorted(countColors.items()):
+      if color == "-": continue
+      label = "\t"
+      if color != "?" and count != NUM_SPACES_PER_VIAL:
+        label += "(too many)" if count > NUM_SPACES_PER_VIAL else "(too few)"
+      lines.append(f"  {formatVialColor(color, text=color)}: \t{count}" + label)
 
-      # We hope to restrict some moves that are legally valid, but expand the search space unnecessarily
-      # Only allow each move to end up in the first empty vial, other empty vials are not allowed
-      # If there are two ways to complete a vial, only allow the first way
-      # CONSIDER: If this vial can move into a vial that already has only this color in it (but is not empty),
-      # That should be the only valid move for this vial
+    if len(errors):
+      lines.append("\nErrors:")
+      for error in errors:
+        lines.append("  " + error)
 
-      # We already decided that this vial doesn't have any legal moves
-      if not moveValid[start]:
-        continue
+    print("\n".join(lines))
+  def _analyzeColors(self) -> tuple[dict[str, int], list[str]]: # (dict[color, occurrences], list[error strings])
 
-      valid, startColor, endColor, endEmptySpaces, willComplete = self.__prepareMove(start, end)
+    # Analyze the colors represented
+    countColors = defaultdict(int)
+    for code in itertools.chain.from_iterable(self._state):
+      countColors[Game._colorNames[code]] += 1
 
-      # Obviously, this isn't a valid move
-      if not valid:
+    errors = list()
+    hasUnknowns = countColors["?"] == 0
+    for color, count in countColors.items():
+      if color == "?" or color == "-":
         continue
 
-      # Only allow the first move into an empty vial from a given start vial
-      if endColor == "-":
-        if emptyValid[start]:
-          emptyValid[start] = False
-        else:
-          continue
-      elif willComplete:
-        # If there is a move that will complete a color in a vial, then moving from that vial
-        # is never valid. Either, it would attempt to complete the other direction OR  it would
-        # only move into an empty vial. Obviously, there are no other colors for it to land on.
-        moveValid[end] = False
-
-      # Fine, it's valid
-      moves.append((start, end))
+      if count > NUM_SPACES_PER_VIAL:
+        errors.append(f"Color '{color}' appears too many times ({count})!")
+      elif count < NUM_SPACES_PER_VIAL and hasUnknowns:
+        errors.append(f"Color '{color}' appears too few times ({count})!")
 
-    return moves
+    self.root._hasUnknowns = hasUnknowns
+    self.root._colorError = len(errors) > 0
+    return (countColors, errors)
 
-  def __str__(self) -> str:
-    out = list()
-    for vial, space in itertools.product(range(self.__numVials), range(NUM_SPACES_PER_VIAL)):
-      out.append(self.vials[vial][space])
-    return " ".join(out)
-  def __eq__(self, other: object) -> bool:
-    """Overrides the default implementation"""
-    if isinstance(other, Game):
-      return self.__str__() == other.__str__()
-    return False
-  def __hash__(self) -> int:
-    return hash(self.__str__())
 
-  def _getCompletionStr(self) -> str:
-    return " ".join(map(lambda x: x[0], self.completionOrder))
-  def _completion_eq(self, other: object) -> bool:
-    if isinstance(other, Game):
-      return self._getCompletionStr() == other._getCompletionStr()
-    return False
-  def _completion_hash(self) -> int:
-    return hash(self._getCompletionStr())
+  def spawn(self, move: Move) -> "Game":
+    newGame = Game(self._state, move, self)
+    newGame.applyMove(move[0], move[1])
+    return newGame
 
-  def getNumVials(self) -> int:
-    return self.__numVials
-  def getDepth(self) -> int:
-    return self._numMoves
+  def generateNextGames(self) -> list["Game"]:
+    return [self.spawn(move) for move in self.generateNextMoves()]
 
 class BigSolutionDisplay:
   rootGame: "Game"
@@ -979,6 +1475,7 @@ class BigSolutionDisplay:
   _maxDeadEnds: DeadEndSearchResults|None
   _earliestSafeStep: DeadEndSearchResults|None
   __simpleDeadEndsMax = 99
+  __deadEndPollSeconds = 0.1
   __spawnThreadLock = threading.Lock()
   __firstSpawnTimestamp: float|None
   __hasSpawnedThread = False
@@ -1302,7 +1799,10 @@ class BigSolutionDisplay:
 
       if not self.detailInformation:
         maxDisplay = self.__simpleDeadEndsMax
-        deadEndsTxt = f"{maxDisplay}+" if deadEndsResults.numDeadEnds > maxDisplay else deadEndsResults.numDeadEnds
+        if deadEndsResults.numDeadEnds > maxDisplay:
+          deadEndsTxt = f"{maxDisplay}+"
+        else:
+          deadEndsTxt = f"{deadEndsResults.numDeadEnds}+" if deadEndsResults.isPartial else deadEndsResults.numDeadEnds
         newIntroLines.append(f"Dead ends: {deadEndsTxt}")
       else:
         if not step.deadEndsSearch:
@@ -1324,10 +1824,12 @@ class BigSolutionDisplay:
               # Zero case should not have a sign
               deltaEnds = "+" + str(deltaEnds)
 
+          # Partial counts are only the least there are
+          partialMark = "+" if deadEndsResults.isPartial else ""
           detailsDict = {
-            "Dead ends": deadEndsResults.numDeadEnds,
+            "Dead ends": f"{deadEndsResults.numDeadEnds}{partialMark}",
             "Delta": deltaEnds,
-            "Solutions": deadEndsResults.numEventualSolutions,
+            "Solutions": f"{deadEndsResults.numEventualSolutions}{partialMark}",
             "Search (s)": deadEndsResults.searchSeconds,
             "Iterations": deadEndsResults.searchIterations,
           }
@@ -1366,7 +1868,7 @@ class BigSolutionDisplay:
   @staticmethod
   def _getDeadEndSummary(step: SolutionStep) -> str:
     r = step.deadEndsSearch
-    if not r or not r.searchDataAvailable:
+    if not r or not r.searchDataAvailable or r.isPartial:
       return ""
     elif not r.hasDeadEnds:
       return "No dead ends - all clear"
@@ -1491,46 +1993,103 @@ class BigSolutionDisplay:
     if self.debugInformation:
       print("Computing dead end results for final game states")
 
-    for step in reversed(self._steps):
-      if step.deadEndsSearch is not None:
-        continue # Avoid duplicative work
+    # Searches of games with unknown spaces may ask the user, so they stay in this thread
+    if DEAD_END_SEARCH_PROCESS and not any(BaseGame.UNKNOWN_CODE in vial for vial in self.rootGame._state):
+      self.__countDeadEndsInProcess()
+    else:
+      self.__countDeadEndsInThread()
 
+    if self.debugInformation:
+      print("Computation thread exiting")
+    self.__hasSpawnedThread = False
+  def __getStepsToCount(self) -> dict[int, SolutionStep]:
+    """Returns the steps still without results, by the depth of the game before them, from the end of the solution."""
+    steps: dict[int, SolutionStep] = dict()
+    for step in reversed(self._steps):
       curGame = step.game.prev # Perform computations from *before* the step is performed
       if curGame.getDepth() <= 2:
-        self.__finishedDeadEndsSearch = True
-        break # We made it all the way to the beginning
+        break
+      steps[curGame.getDepth()] = step
+    return steps
+  def __countDeadEndsInThread(self) -> None:
+    counter = StepDeadEndCounter(self.rootGame)
+    for step in self.__getStepsToCount().values():
+      # Steps with results are counted again, since the earlier steps build on what they reach
+      results = counter.countStep(step.game.prev)
+      if step.deadEndsSearch is None and self.__receiveDeadEndResults(step, results):
+        return
+      if results.isPartial:
+        self.__stopAtSearchLimit()
+        return
+    self.__finishedDeadEndsSearch = True # We made it all the way to the beginning
+  def __countDeadEndsInProcess(self) -> None:
+    """Counts the steps in a worker process, which keeps the search from slowing down the display.
+    Each step's results are shown as soon as they arrive, and the worker is stopped once the user passes its step."""
+    steps = self.__getStepsToCount()
+    if not steps:
+      self.__finishedDeadEndsSearch = True
+      return
 
-      stepDepth = curGame.getDepth()
-      results = SafeGameSolver(curGame).analyzeDeadEndStates()
-      self.__updateDeadEndResults(step, results)
+    # The worker rebuilds each game from its moves
+    root = self.rootGame
+    stepMoves = [step.game.prev.getMovesFromRoot() for step in steps.values()]
+    # Forking this thread could copy locks held by the display, so the worker starts fresh
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_countStepDeadEndsInWorker, args=(sender, root.vials, root.drainMode, root.blindMode, stepMoves), daemon=True)
+    process.start()
+    sender.close()
+    try:
+      for countingDepth in steps:
+        # Wait in short polls, so the worker can be stopped while it counts
+        while not receiver.poll(self.__deadEndPollSeconds):
+          if self.__hasAdvancedBeyondStep(countingDepth) or Game.quit:
+            return
+        try:
+          stepDepth, searchData, isPartial = receiver.recv()
+        except EOFError:
+          return # The worker stopped early
+        step = steps[stepDepth]
+        if step.deadEndsSearch is None and self.__receiveDeadEndResults(step, DeadEndSearchResults(step.game.prev, *searchData, isPartial=isPartial)):
+          return
+        if isPartial:
+          self.__stopAtSearchLimit()
+          return
+    finally:
+      if process.is_alive():
+        process.terminate()
+      process.join()
+      receiver.close()
+    self.__finishedDeadEndsSearch = True # We made it all the way to the beginning
+  def __stopAtSearchLimit(self) -> None:
+    self.__finishedDeadEndsSearch = True
+    if self.debugInformation:
+      print(formatVialColor("wn", "Stopping dead end search.") + " Counting reached its limit of games.")
+  def __receiveDeadEndResults(self, step: SolutionStep, results: DeadEndSearchResults) -> bool:
+    """Records the results of one step. Returns True when the earlier steps are no longer worth searching."""
+    stepDepth = results.game.getDepth()
+    self.__updateDeadEndResults(step, results)
+    if self.__lastComputedDeadEndStepDepth is None or stepDepth < self.__lastComputedDeadEndStepDepth:
       self.__lastComputedDeadEndStepDepth = stepDepth
-      if self.debugInformation:
-        BigSolutionDisplay.PrintDeadEndSearchResults(results)
-
-      if results.numDeadEnds > 9999 or results.searchSeconds > 30:
-        self.__finishedDeadEndsSearch = True
-        if self.debugInformation:
-          print(formatVialColor("wn", "Stopping dead end search.") + " Results are taking too long.")
-        break
+    if self.debugInformation:
+      BigSolutionDisplay.PrintDeadEndSearchResults(results)
 
-      if self.__hasAdvancedBeyondStep(stepDepth):
-        if self.debugInformation:
-          print(formatVialColor("wn", "Stopping dead end search.") + " User has already passed this step.")
-        break
+    if self.__hasAdvancedBeyondStep(stepDepth):
+      if self.debugInformation:
+        print(formatVialColor("wn", "Stopping dead end search.") + " User has already passed this step.")
+      return True
 
-      if not self.detailInformation and results.numDeadEnds > self.__simpleDeadEndsMax:
-        if self.debugInformation:
-          print(formatVialColor("wn", "Stopping dead end search.") + " We've gathered enough information for the simple view.")
-        break
+    if not self.detailInformation and results.numDeadEnds > self.__simpleDeadEndsMax:
+      if self.debugInformation:
+        print(formatVialColor("wn", "Stopping dead end search.") + " We've gathered enough information for the simple view.")
+      return True
 
-    if self.debugInformation:
-      print("Computation thread exiting")
-    self.__hasSpawnedThread = False
+    return False
   def __updateDeadEndResults(self, step: SolutionStep, results: DeadEndSearchResults) -> None:
     step.deadEndsSearch = results
     if not self._maxDeadEnds or results.numDeadEnds > self._maxDeadEnds.numDeadEnds:
       self._maxDeadEnds = results
-    if not results.hasDeadEnds and (not self._earliestSafeStep or results.game.getDepth() < self._earliestSafeStep.game.getDepth()):
+    if not results.hasDeadEnds and not results.isPartial and (not self._earliestSafeStep or results.game.getDepth() < self._earliestSafeStep.game.getDepth()):
       self._earliestSafeStep = results
 
 
@@ -1659,7 +2218,7 @@ class BigSolutionDisplay:
       while displayIndex < len(safeSolver.deadEndsLocated) and displayIndex >= 0:
         if printInformation:
           print(f"\nDisplaying dead end {Style.BRIGHT}{displayIndex+1}{Style.NORMAL} of {Style.BRIGHT}{len(safeSolver.deadEndsLocated)}{Style.NORMAL}: {Style.DIM}(Next, Prev. 'Enter' exits){Style.NORMAL}")
-          deadEnd = safeSolver.deadEndsLocated[displayIndex]
+          deadEnd = safeSolver.deadEndsLocated[displayIndex].materialize()
           deadEnd.printVials()
           deadEnd.printMoves(fromGame=curGame)
         printInformation=True
@@ -1687,7 +2246,12 @@ class BigSolutionDisplay:
           print(f"Unrecognized key ({k})")
           printInformation=False
 
-    print("☠️ Dead ends ahead" if r.hasDeadEnds else "🟢 All clear")
+    if r.hasDeadEnds:
+      print("☠️ Dead ends ahead")
+    elif r.isPartial:
+      print("🟡 No dead ends found before counting reached its limit of games")
+    else:
+      print("🟢 All clear")
   def _reportDeadEnd(self, seed: "Game", deadEnd: "Game") -> None:
     deadEnd.printMoves()
 
@@ -1707,7 +2271,8 @@ class BigSolutionDisplay:
     solutions = formatVialColor("bold", f"{r.numEventualSolutions} solutions")
     searchTime = formatVialColor("bold", f"{r.searchSeconds} seconds")
 
-    print(f"Searched {iterations} and found {deadEnds} and {solutions} in {searchTime} (step {r.game.getDepth()})")
+    partial = " " + formatVialColor("wn", "Partial counts.") + " Counting reached its limit of games." if r.isPartial else ""
+    print(f"Searched {iterations} and found {deadEnds} and {solutions} in {searchTime} (step {r.game.getDepth()}){partial}")
 
 def playGame(game: "Game"):
   currentGame = game
@@ -1743,8 +2308,70 @@ def playGame(game: "Game"):
 
   print("Goodbye.")
 
+class TranspositionTable:
+  """The fewest moves known to reach each game, keyed by the game's hash and blocked vial.
+  Each entry keeps the game's board, so a different game with the same hash is never mistaken for it.
+  Holds at most `capacity` games, and forgets the oldest ones to make room."""
+  EVICT_FRACTION = 8 # Forget an eighth of the table at a time, so eviction is rare
+  DEAD_END = -1 # Recorded for games with no solution below them, so every later arrival is skipped
+
+  capacity: int
+  numRecorded: int # Distinct games recorded, including those since forgotten
+  _entries: dict[int, tuple[int, "PackedVials", int|None]] # key -> (numMoves, state, blockedVial), ordered from the oldest to the newest record
+
+  def __init__(self, capacity: int):
+    self.capacity = max(capacity, 1)
+    self.numRecorded = 0
+    self._entries = dict()
+
+  def __len__(self) -> int:
+    return len(self._entries)
+  def clear(self) -> None:
+    self._entries.clear()
+  @staticmethod
+  def _getKey(game: BaseGame, isFinished: bool) -> int:
+    # Each arrangement of a finished game is still reported as a distinct solution
+    return hash(game._state) if isFinished else game._getSearchHash()
+  @staticmethod
+  def _isSameGame(state: "PackedVials", blockedVial: int|None, otherState: "PackedVials", otherBlockedVial: int|None, isFinished: bool) -> bool:
+    if isFinished:
+      return state == otherState # Finished games have no moves, so the blocked vial doesn't matter
+    if state == otherState and blockedVial == otherBlockedVial:
+      return True
+    return BaseGame._canonicalizeState(state, blockedVial) == BaseGame._canonicalizeState(otherState, otherBlockedVial)
+  def get(self, game: BaseGame, isFinished: bool = False) -> int | None:
+    entry = self._entries.get(TranspositionTable._getKey(game, isFinished))
+    if entry is None or not TranspositionTable._isSameGame(entry[1], entry[2], game._state, game._getBlockedVial(), isFinished):
+      return None
+    return entry[0]
+  def record(self, game: BaseGame, numMoves: int, isFinished: bool = False) -> bool:
+    """Records a game reached in numMoves. Returns False when it was already reached in as few moves."""
+    return self.recordState(TranspositionTable._getKey(game, isFinished), game._state, game._getBlockedVial(), numMoves, isFinished)
+  def recordState(self, key: int, state: "PackedVials", blockedVial: int|None, numMoves: int, isFinished: bool = False) -> bool:
+    """Records a board without its game, keyed like `record` would key the game."""
+    if isFinished:
+      blockedVial = None
+    entry = self._entries.get(key)
+    if entry is not None:
+      isSameGame = TranspositionTable._isSameGame(entry[1], entry[2], state, blockedVial, isFinished)
+      if isSameGame and entry[0] <= numMoves:
+        return False
+      del self._entries[key] # Recorded again as the newest game
+      if not isSameGame:
+        self.numRecorded += 1 # The other game is forgotten, and is explored again if reached again
+    else:
+      if len(self._entries) >= self.capacity:
+        self._evictOldest()
+      self.numRecorded += 1
+    self._entries[key] = (numMoves, state, blockedVial)
+    return True
+  def _evictOldest(self) -> None:
+    numEvicted = max(self.capacity // self.EVICT_FRACTION, 1)
+    for key in list(itertools.islice(self._entries, numEvicted)):
+      del self._entries[key]
+
 class BaseSolver:
-  SOLVE_METHODS = Literal["MIX","BFS","DFS","DFR"]
+  SOLVE_METHODS = Literal["MIX","BFS","DFS","DFR","ASTAR","IDA","BEAM"]
 
   # Inputs/parameters
   seedGame: Game
@@ -1779,16 +2406,36 @@ class BaseSolver:
   solutionDepth = defaultdict(int)
   uniqueSolsDepth = defaultdict(int)
   solFindSeconds = defaultdict(int)
-  uniqueSolutions: defaultdict[int, list["Game"]] = defaultdict(list)
+  uniqueSolutions: defaultdict[int, list["Game|SolutionSummary"]] = defaultdict(list)
   isUniqueList: list[bool] = list()
 
   # Solving data
   _searchBFS: bool
-  _q: deque["Game"]
+  _searchAStar: bool
+  MOVE_ORDERINGS = Literal["GENERATED","SHUFFLE","PROMISE"]
+  # PROMISE has depth first searches try completing moves first, then merges onto the largest runs, then vacating moves.
+  # Ties are broken randomly when SHUFFLE_NEXT_MOVES is on.
+  moveOrdering: MOVE_ORDERINGS|None = None # None shuffles for DFR, and ranks by promise otherwise
+  followMacroMoves = True # Whether depth first searches make forced moves without queueing the games between them
+  followSoloPours = False # Also pour onto vials holding only that color right away. Much faster, but solutions may be a few moves longer.
+  rememberAcrossAttempts = False # Whether DFR attempts skip the dead ends and deeper arrivals of earlier attempts
+  pruneCommutingMoves = True # Whether moves that commute with the previous move are explored in only one order
+  branchAndBound = True # Whether depth first searches skip games that cannot beat minSolution, instead of quitting the attempt
+  _attemptMemory: TranspositionTable|None # Fewest moves to each game over all attempts, or DEAD_END
+  _searchIDA: bool
+  _idaBound: int # Most estimated moves explored by the current IDA threshold
+  _idaNextBound: int|None # Fewest estimated moves pruned by the current IDA threshold
+  _idaBoundStart: int # numIterations when the current IDA threshold began
+  _searchBeam: bool
+  _beamDepth: int # Depth of the games most recently trimmed to the beam
+  _beamTrimmed: bool # Whether the beam has dropped any game this attempt
+  _q: deque["BaseGame"] # A heap of (estimatedMoves, -numMoves, pushOrder, game) when searching with A*
+  _numPushed: int
   _findSolutionsRemaining: int
   REPORT_ITERATION_FREQ: int
   QUEUE_CHECK_FREQ: int
   REPORT_SEC_FREQ: int
+  WORKER_POLL_SECONDS = 0.1 # How often the main process checks on its workers for new solutions
 
   def __init__(self, game: "Game"):
     self.seedGame = game
@@ -1796,13 +2443,187 @@ class BaseSolver:
   def setSolveMethod(self, newSolveMethod: SOLVE_METHODS) -> None:
     raise "Method not yet implemented"
 
-  def solveGame(self, solveMethod: SOLVE_METHODS = "MIX", numSolutions: int = 1) -> None:
+  def solveGame(self, solveMethod: SOLVE_METHODS = "MIX", numSolutions: int = 1, numWorkers: int = 1) -> None:
     if numSolutions < 1: numSolutions = 1
     self.findSolutionCount = numSolutions
-    self._findSolutions(solveMethod)
+    numWorkers = numWorkers or os.cpu_count() or 1
+    if numWorkers > 1 and self._canShareAttempts(solveMethod):
+      self._findSolutionsInParallel(solveMethod, numWorkers)
+    elif numWorkers > 1 and self._canSplitBFS(solveMethod):
+      self._findSolutionsBFSInParallel(numWorkers)
+    else:
+      self._findSolutions(solveMethod)
     self._onAfterFindSolutions()
     saveGame(self.seedGame)
 
+  def _getWorkerClass(self) -> "type[WorkerSolver]|None":
+    """The solver that runs a share of the attempts in each worker process, or None when attempts can't be shared."""
+    return None
+  def _canSearchInWorkers(self) -> bool:
+    """Workers can never ask for user input, so the whole game must be known."""
+    seedGame = self.seedGame
+    if self._getWorkerClass() is None:
+      return False
+    return seedGame.prev is None and not any(BaseGame.UNKNOWN_CODE in vial for vial in seedGame._state)
+  def _canShareAttempts(self, solveMethod: SOLVE_METHODS) -> bool:
+    """Only independent random attempts can be shared."""
+    return solveMethod == "DFR" and self.findSolutionCount > 1 and self._canSearchInWorkers()
+  def _canSplitBFS(self, solveMethod: SOLVE_METHODS) -> bool:
+    return solveMethod == "BFS" and self._canSearchInWorkers()
+  def _findSolutionsInParallel(self, solveMethod: SOLVE_METHODS, numWorkers: int) -> None:
+    """Shares the attempts between worker processes, which all prune against the shortest solution found by any of them."""
+    setSolveMethod(solveMethod)
+    print(f"Sharing {self.findSolutionCount} attempts between {numWorkers} worker processes.")
+    self.solutionSetStart = self.solutionStart = time()
+    self.minSolutionUpdates = 0
+    self.numSolutionsAbandoned = 0
+    self._q = deque()
+
+    seedGame = self.seedGame
+    attemptsLeft = multiprocessing.Value("i", self.findSolutionCount)
+    sharedMinMoves = multiprocessing.Value("i", 0)
+    initArgs = (self._getWorkerClass(), seedGame.vials, seedGame.drainMode, seedGame.blindMode, attemptsLeft, sharedMinMoves)
+    with multiprocessing.Pool(numWorkers, initializer=_initSolveWorker, initargs=initArgs) as pool:
+      pendingResults = pool.map_async(_runSolveWorker, [solveMethod] * numWorkers)
+      # Workers don't print, so each shorter solution is reported here as it is shared
+      reportedMoves = 0
+      while True:
+        pendingResults.wait(self.WORKER_POLL_SECONDS)
+        minMoves = sharedMinMoves.value
+        if self.branchAndBound and minMoves and minMoves != reportedMoves:
+          reportedMoves = minMoves
+          self._onShorterSolutionFound(minMoves)
+        if pendingResults.ready():
+          break
+      workerResults = pendingResults.get()
+
+    self.solutionSetEnd = self.solutionEnd = time()
+    self._mergeWorkerResults(workerResults)
+  def _findSolutionsBFSInParallel(self, numWorkers: int) -> None:
+    """Searches one depth at a time, with each depth expanded across worker processes.
+    Every game belongs to the worker picked by its hash, so each worker finds its own duplicates without sharing a lock.
+    Children are ordered by their parent's order, then by their move, so every worker settles duplicates the same way
+    the single process search does, and finds the same shortest solution with the same statistics."""
+    setSolveMethod("BFS")
+    print(f"Splitting each depth of the search between {numWorkers} worker processes.")
+    self.solutionSetStart = self.solutionStart = time()
+    self.minSolutionUpdates = 0
+    self.numSolutionsAbandoned = 0
+    self.solutionsAttempted += 1
+    self._q = deque()
+
+    seedGame = self.seedGame
+    connections: list["multiprocessing.connection.Connection"] = []
+    processes: list[multiprocessing.Process] = []
+    inboxes = [multiprocessing.Queue() for _ in range(numWorkers)]
+    for workerIndex in range(numWorkers):
+      connection, workerConnection = multiprocessing.Pipe()
+      process = multiprocessing.Process(target=_runBFSLayerWorker, daemon=True,
+                                        args=(workerConnection, inboxes, workerIndex, numWorkers, seedGame.vials, seedGame.drainMode, seedGame.blindMode))
+      process.start()
+      connections.append(connection)
+      processes.append(process)
+
+    solutionRef: "BFSLayerWorker.NodeRef|None" = None
+    maxQueueLength = 1
+    movesPerGame = seedGame.getNumVials() ** 2
+    layerKeys = [0] # orderKey of each game expanded at this depth
+    acks: list[list[int]] = [[] for _ in range(numWorkers)]
+    while True:
+      # Expand this depth, with each child sent to the worker that owns its hash
+      for connection, workerAcks in zip(connections, acks):
+        connection.send(("step", workerAcks))
+      acks = [[] for _ in range(numWorkers)]
+      numChildren = 0
+      layerSolutions = []
+      queuedKeys = []
+      for connection in connections:
+        numSent, workerAcks, workerSolutions, workerQueuedKeys = connection.recv()
+        numChildren += numSent
+        for workerIndex, parentIds in workerAcks.items():
+          acks[workerIndex].extend(parentIds)
+        layerSolutions.extend(workerSolutions)
+        queuedKeys.extend(workerQueuedKeys)
+      if numChildren == 0:
+        break
+      queuedKeys.sort()
+      maxQueueLength = max(maxQueueLength, BaseSolver._getMaxQueueLength(layerKeys, queuedKeys, movesPerGame))
+      layerKeys = queuedKeys
+
+      # The first solution of the shallowest depth is the one the single process search keeps
+      if layerSolutions and solutionRef is None:
+        _, solutionRef = min(layerSolutions)
+
+    # Follow the solution back to the seed game, one worker at a time
+    solutionMoves: list["Move"] = []
+    while solutionRef is not None:
+      workerIndex, nodeId = solutionRef
+      connections[workerIndex].send(("getNode", nodeId))
+      solutionRef, move = connections[workerIndex].recv()
+      if move is not None:
+        solutionMoves.append(move)
+    solutionMoves.reverse()
+
+    workerResults: list[WorkerResults] = []
+    for connection in connections:
+      connection.send(("finish", None))
+      workerResults.append(connection.recv())
+    for process in processes:
+      process.join()
+
+    self.solutionSetEnd = self.solutionEnd = time()
+    workerResults[0].solutionMoves = solutionMoves or None
+    self._mergeWorkerResults(workerResults)
+    self.maxQueueLength = maxQueueLength
+    if self.minSolution:
+      self.minSolutionUpdates += 1
+  @staticmethod
+  def _getMaxQueueLength(layerKeys: list[int], queuedKeys: list[int], movesPerGame: int) -> int:
+    """The longest the single process queue gets while expanding a depth.
+    After each game is expanded, it holds the rest of the depth and the children queued so far."""
+    maxLength = 0
+    numChildren = 0
+    for numExpanded, parentKey in enumerate(layerKeys, 1):
+      while numChildren < len(queuedKeys) and queuedKeys[numChildren] // movesPerGame <= parentKey:
+        numChildren += 1
+      maxLength = max(maxLength, len(layerKeys) - numExpanded + numChildren)
+    return maxLength
+  def _mergeWorkerResults(self, workerResults: list[WorkerResults]) -> None:
+    self.numIterations = 0
+    self.numDeadEnds = 0
+    self.numPartialSolutionsGenerated = 0
+    self.numSwallowedGamesFound = 0
+    self.numUniqueStatesComputed = 0
+    self.numDuplicateGames = 0
+    self.maxQueueLength = 0
+    for results in workerResults:
+      self.solutionsAttempted += results.solutionsAttempted
+      self.minSolutionUpdates += results.minSolutionUpdates
+      self.numSolutionsAbandoned += results.numSolutionsAbandoned
+      self.numIterations += results.numIterations
+      self.numDeadEnds += results.numDeadEnds
+      self.numPartialSolutionsGenerated += results.numPartialSolutionsGenerated
+      self.numSwallowedGamesFound += results.numSwallowedGamesFound
+      self.numUniqueStatesComputed += results.numUniqueStatesComputed
+      self.numDuplicateGames += results.numDuplicateGames
+      self.maxQueueLength = max(self.maxQueueLength, results.maxQueueLength)
+      for name, counter in results.depthCounters.items():
+        merged = getattr(self, name)
+        for depth, count in counter.items():
+          merged[depth] += count
+
+      # Replay the moves, so the solution is a normal chain of games from the seed game
+      if results.solutionMoves is not None and (not self.minSolution or len(results.solutionMoves) < self.minSolution._numMoves):
+        solution = self.seedGame
+        for move in results.solutionMoves:
+          solution = solution.spawn(move)
+        self.minSolution = solution
+
+    # Unique solutions are judged in the order the attempts were claimed, as if they ran one after another
+    solutions = [solution for results in workerResults for solution in results.solutions]
+    for _, summary in sorted(solutions, key=lambda item: item[0], reverse=True):
+      self._recordUniqueSolution(summary.completionStr, summary)
+
   def _findSolutions(self, solveMethod: SOLVE_METHODS, suppressSolveMethodNotification=False):
     """
     Intelligent search through all the possible game states until we find a solution.
@@ -1825,15 +2646,18 @@ class BaseSolver:
     self.solutionSetStart = time()
     self.deadEndDepth[1]
 
-    self.REPORT_ITERATION_FREQ = 10000 if SOLVE_METHOD == "BFS" else 1000
+    self.REPORT_ITERATION_FREQ = 10000 if SOLVE_METHOD in ("BFS", "ASTAR", "IDA") else 1000
     self.QUEUE_CHECK_FREQ = self.REPORT_ITERATION_FREQ * 10
     self.REPORT_SEC_FREQ = 15
 
 
-    computed: set["Game"]|None = None
+    computed: TranspositionTable|None = None
+    self._attemptMemory = TranspositionTable(TRANSPOSITION_TABLE_SIZE) if self.rememberAcrossAttempts and SOLVE_METHOD == "DFR" else None
 
 
     while Game.reset or not self.minSolution or self._findSolutionsRemaining > 0:
+      if Game.reset and self._attemptMemory is not None:
+        self._attemptMemory.clear() # The games changed with the newly discovered colors
       Game.reset = False
       if not self._onInitSolutionAttempt():
         break
@@ -1846,17 +2670,31 @@ class BaseSolver:
 
       # Setup our search
       solution: Game | None = None
-      self._q = deque()
-      computed = set()
       self._searchBFS = False
+      self._searchAStar = False
+      self._searchIDA = False
+      self._searchBeam = False
       if Game.latest:
+        self._q = deque()
         self._q.append(Game.latest)
         Game.latest = None
         self._searchBFS = True
         expectSolution = False
       else:
-        self._q.append(self.seedGame)
         self._searchBFS = self._shouldSearchBFS()
+        self._searchAStar = SOLVE_METHOD == "ASTAR"
+        self._searchIDA = SOLVE_METHOD == "IDA"
+        self._searchBeam = SOLVE_METHOD == "BEAM"
+        self._beamDepth = self.seedGame._numMoves
+        self._beamTrimmed = False
+        self._q = list() if self._searchAStar else deque()
+        self._numPushed = 0
+        self._pushQueue(self.seedGame)
+        if self._searchIDA:
+          self._idaBound = self.seedGame.getMinRemainingMoves()
+          self._idaNextBound = None
+          self._idaBoundStart = 0
+      computed = TranspositionTable(self._getTableCapacity())
 
       self.numIterations = 0
       self.numDeadEnds = 0
@@ -1864,6 +2702,9 @@ class BaseSolver:
       self.numSwallowedGamesFound = 0
       self.numDuplicateGames = 0
       self.maxQueueLength = 1
+      attemptMinMoves = self._getMinSolutionMoves()
+      attemptImprovedAt = 0 # numIterations when this attempt last found a shorter solution
+      skippedRememberedGames = False # Whether earlier attempts, which may have been cut short, stood in for part of this one
 
       # CONSIDER: Switching our approach based on the state of the game
       # When we still have unknowns, we should find the shortest path to find an unknown,
@@ -1871,14 +2712,25 @@ class BaseSolver:
       # This makes it easier for a human to follow along in the game
 
       # Perform the search
-      while self._q and not solution:
+      # IDA starts over with a larger threshold each time the current one runs dry
+      while (self._q or self._searchIDA and self._deepenIDABound(computed)) and not solution:
         # Break out
         if Game.reset or Game.quit:
           expectSolution = False
           break
 
+        # A beam keeps only the best games once each depth has been queued
+        if self._searchBeam and self._q[0]._numMoves > self._beamDepth:
+          self._trimBeam()
+
         # Taking from the front or the back makes all the difference between BFS and DFS
-        current = self._q.popleft() if self._searchBFS else self._q.pop()
+        if self._searchAStar:
+          estimatedMoves, _, _, current = heapq.heappop(self._q)
+        else:
+          current = self._q.popleft() if self._searchBFS else self._q.pop()
+        knownMoves = computed.get(current)
+        if knownMoves is not None and knownMoves < current._numMoves:
+          continue # A shorter path to this game was queued after this one
 
         # Perform some work at some checkpoints
         self.numIterations += 1
@@ -1887,42 +2739,94 @@ class BaseSolver:
           if not continueSearching:
             expectSolution = False
             self._findSolutionsRemaining = 0
+            if self.minSolution:
+              break # Keep the shortest solution found so far
 
         # Prune if we've found a cheaper solution
-        if not self._searchBFS and self.minSolution and self.minSolution._numMoves <= current._numMoves:
-          self.numSolutionsAbandoned += 1
-          break # Quit this attempt, and try a different one
+        if self._searchAStar and self.minSolution and self.minSolution._numMoves <= estimatedMoves:
+          break # Every game left in the queue needs at least as many moves
+        if self._searchIDA and self.minSolution and self.minSolution._numMoves <= self._idaBound:
+          break # Smaller thresholds held no solution, so this one is the shortest
+        if self._searchBeam and self.minSolution and self.minSolution._numMoves <= current._numMoves:
+          break # Deeper games can only find longer solutions
+        minSolutionMoves = None if self._searchBFS else self._getMinSolutionMoves()
+        if minSolutionMoves is not None:
+          if minSolutionMoves != attemptMinMoves:
+            attemptMinMoves = minSolutionMoves
+            attemptImprovedAt = self.numIterations
+          if self.branchAndBound:
+            if SOLVE_METHOD == "DFR" and self.numIterations - attemptImprovedAt > DFR_ATTEMPT_ITERATIONS:
+              self.numSolutionsAbandoned += 1
+              break # This attempt stopped finding shorter solutions, so a different random attempt gets a turn
+            if minSolutionMoves <= current._numMoves + current.getMinRemainingMoves():
+              continue # No shorter solution lies below this game
+          elif minSolutionMoves <= current._numMoves:
+            self.numSolutionsAbandoned += 1
+            break # Quit this attempt, and try a different one
+
+        if self._attemptMemory is not None:
+          self._attemptMemory.record(current, current._numMoves)
 
         # Check all next moves
         hasNetNewNextGame = False
-        nextGames = current.generateNextGames()
+        allNextGamesDead = True
+        nextMoves = current.generateNextMoves(self.pruneCommutingMoves)
         if Game.reset or Game.quit:
           # Break out after user input
           expectSolution = False
           break
 
-        if SHUFFLE_NEXT_MOVES: random.shuffle(nextGames)
-        for nextGame in nextGames:
+        # Forced moves are made right away, so the games along the way are never queued
+        if self.followMacroMoves and not self._searchBFS and not self._searchAStar:
+          current, nextMoves = self._followMacroMoves(current, nextMoves, computed)
+          if current is None:
+            continue
+
+        # Only the moves are ordered, each child is spawned once it is reached
+        self._orderNextMoves(current, nextMoves)
+        for nextGame in current.generateNextNodes(nextMoves):
           self.numPartialSolutionsGenerated += 1
           self.partialDepth[nextGame._numMoves] += 1
 
-          if nextGame in computed:
+          if self._searchIDA:
+            estimatedMoves = nextGame._numMoves + nextGame.getMinRemainingMoves()
+            if estimatedMoves > self._idaBound:
+              if self._idaNextBound is None or estimatedMoves < self._idaNextBound:
+                self._idaNextBound = estimatedMoves
+              continue
+
+          # Games are explored again only when reached in fewer moves
+          isFinished = nextGame.isFinished()
+          if self._attemptMemory is not None:
+            # Earlier attempts already searched below this game in as few moves
+            knownMoves = self._attemptMemory.get(nextGame, isFinished)
+            if knownMoves != TranspositionTable.DEAD_END:
+              allNextGamesDead = False
+            if knownMoves == TranspositionTable.DEAD_END or (knownMoves is not None and knownMoves < nextGame._numMoves):
+              self.numDuplicateGames += 1
+              self.dupGameDepth[nextGame._numMoves] += 1
+              skippedRememberedGames = skippedRememberedGames or knownMoves != TranspositionTable.DEAD_END
+              continue
+          if not computed.record(nextGame, nextGame._numMoves, isFinished):
             self.numDuplicateGames += 1
             self.dupGameDepth[nextGame._numMoves] += 1
             continue
-          computed.add(nextGame)
 
           hasNetNewNextGame = True
-          if nextGame.isFinished():
+          if isFinished:
             self.solutionEnd = time()
             if self._onSolutionFound(nextGame):
               break # Finish searching
           else:
-            self._q.append(nextGame)
+            self._pushQueue(nextGame)
+
+        # Every move from a game whose next games are all dead ends leads to another dead end
+        if self._attemptMemory is not None and allNextGamesDead and self._leadsOnlyToDeadEnds(current):
+          self._attemptMemory.record(current, TranspositionTable.DEAD_END)
 
         # Maintain stats
         self.maxQueueLength = max(self.maxQueueLength, len(self._q))
-        if len(nextGames) == 0:
+        if current.isDeadEnd(nextMoves):
           self.numDeadEnds += 1
           self.deadEndDepth[current._numMoves] += 1
           self._onDeadEndFound(current)
@@ -1931,7 +2835,12 @@ class BaseSolver:
           self.swallowedDepth[current._numMoves] += 1
 
       self.solutionEnd = time()
+      if expectSolution and self._getMinSolutionMoves() is not None and not self._q and self.branchAndBound and not self._searchBFS and not skippedRememberedGames:
+        self._findSolutionsRemaining = 0 # Every shorter solution was ruled out, so more attempts can't improve it
       if expectSolution and not self.minSolution:
+        if self._searchBeam and self._beamTrimmed:
+          print(f"No solution was found within a beam of {BEAM_WIDTH} games. Try a wider beam.")
+          break
         tryAgain = self._onImpossibleGame()
         if not tryAgain:
           break # There are no solutions
@@ -1939,12 +2848,106 @@ class BaseSolver:
       pass
 
     self.solutionSetEnd = time()
-    self.numUniqueStatesComputed = len(computed) if computed else 0
+    self.numUniqueStatesComputed = computed.numRecorded if computed else 0
+
+  def _leadsOnlyToDeadEnds(self, game: BaseGame) -> bool:
+    """Whether every move from this game reaches a recorded dead end.
+    Games are remembered with the vial their last move filled, so every order of the moves is checked with it."""
+    for nextGame in game.generateNextNodes(game.generateNextMoves(pruneCommuting=False)):
+      if nextGame.isFinished() or self._attemptMemory.get(nextGame) != TranspositionTable.DEAD_END:
+        return False
+    return True
+
+  def _getTableCapacity(self) -> int:
+    """Most games remembered by one attempt. IDA and BEAM keep their memory bounded by their own limits."""
+    if self._searchIDA:
+      return IDA_TABLE_SIZE
+    if self._searchBeam:
+      # Enough for the children of the last couple of depths, each of which is at most a full beam
+      return BEAM_WIDTH * len(self.seedGame._state) * 2
+    return TRANSPOSITION_TABLE_SIZE
+
+  def _getMinSolutionMoves(self) -> int|None:
+    """The fewest moves of any solution found so far, which later depth first attempts must beat."""
+    return self.minSolution._numMoves if self.minSolution else None
+
+  def _followMacroMoves(self, current: BaseGame, nextMoves: list["Move"], computed: TranspositionTable) -> tuple[BaseGame|None, list["Move"]]:
+    """Makes each forced move in turn. Each game along the way keeps its own move, so solutions still list every move.
+    Returns the last game and its moves, or (None, []) when the chain reached a searched game, a solution or user input."""
+    while True:
+      macroMove = current.getMacroMove(nextMoves, includeSoloPours=self.followSoloPours)
+      if macroMove is None:
+        return (current, nextMoves)
+      current = current.spawnNode(macroMove)
+      self.numPartialSolutionsGenerated += 1
+      self.partialDepth[current._numMoves] += 1
+
+      if self._searchIDA:
+        estimatedMoves = current._numMoves + current.getMinRemainingMoves()
+        if estimatedMoves > self._idaBound:
+          if self._idaNextBound is None or estimatedMoves < self._idaNextBound:
+            self._idaNextBound = estimatedMoves
+          return (None, [])
+
+      isFinished = current.isFinished()
+      if not computed.record(current, current._numMoves, isFinished):
+        self.numDuplicateGames += 1
+        self.dupGameDepth[current._numMoves] += 1
+        return (None, [])
+      if isFinished:
+        self.solutionEnd = time()
+        self._onSolutionFound(current)
+        return (None, [])
+
+      nextMoves = current.generateNextMoves(self.pruneCommutingMoves)
+      if Game.reset or Game.quit:
+        return (None, [])
+
+  def _orderNextMoves(self, current: BaseGame, nextMoves: list["Move"]) -> None:
+    """Orders the moves in place. Depth first searches explore the last move first."""
+    if self._searchBFS or self._searchAStar:
+      return # Breadth first searches keep the generated order, as the BFS layer workers do
+    ordering = self.moveOrdering or ("SHUFFLE" if SOLVE_METHOD == "DFR" else "PROMISE")
+    if ordering == "SHUFFLE" or (ordering == "PROMISE" and SHUFFLE_NEXT_MOVES):
+      random.shuffle(nextMoves)
+    if ordering == "PROMISE":
+      # The sort is stable, so shuffled moves still break ties randomly
+      nextMoves.sort(key=current.getMovePromise)
+
+  def _pushQueue(self, game: BaseGame) -> None:
+    if self._searchAStar:
+      # Ties go to the deeper game, since it is closer to a solution
+      self._numPushed += 1
+      heapq.heappush(self._q, (game._numMoves + game.getMinRemainingMoves(), -game._numMoves, self._numPushed, game))
+    else:
+      self._q.append(game)
+
+  def _deepenIDABound(self, computed: TranspositionTable) -> bool:
+    """Starts the next IDA threshold from the seed game. Returns False when no game was pruned by the last one."""
+    if self._idaNextBound is None or Game.reset or Game.quit:
+      return False
+    if self.minSolution and self.minSolution._numMoves <= self._idaNextBound:
+      return False
+
+    self._printQueueCheck(self.seedGame)
+    self._idaBound = self._idaNextBound
+    self._idaNextBound = None
+    self._idaBoundStart = self.numIterations
+    computed.clear()
+    self._pushQueue(self.seedGame)
+    return True
+
+  def _trimBeam(self) -> None:
+    """Keeps the best BEAM_WIDTH games of the next depth, all of which are queued."""
+    self._beamDepth = self._q[0]._numMoves
+    if len(self._q) > BEAM_WIDTH:
+      self._q = deque(heapq.nsmallest(BEAM_WIDTH, self._q, key=BaseGame.getBeamScore))
+      self._beamTrimmed = True
 
   def _shouldSearchBFS(self) -> bool:
-    if SOLVE_METHOD == "BFS" or SOLVE_METHOD == "MIX":
+    if SOLVE_METHOD == "BFS" or SOLVE_METHOD == "MIX" or SOLVE_METHOD == "BEAM":
       return True
-    elif SOLVE_METHOD == "DFS" or SOLVE_METHOD == "DFR":
+    elif SOLVE_METHOD == "DFS" or SOLVE_METHOD == "DFR" or SOLVE_METHOD == "ASTAR" or SOLVE_METHOD == "IDA":
       return False
     else:
       raise Exception("Unrecognized solve method: " + SOLVE_METHOD)
@@ -1956,35 +2959,41 @@ class BaseSolver:
       return False
     return True
 
-  def _onIterationReport(self, current: Game) -> bool:
+  def _onIterationReport(self, current: BaseGame) -> bool:
     """Called when the iteration search count exceeds REPORT_ITERATION_FREQ. Return True to continue searching."""
-    if not self._searchBFS:
+    if not self._searchesForShortest():
       print(f"Checked {self.numIterations} iterations.")
     return True
+  def _searchesForShortest(self) -> bool:
+    """Whether the search only ends once the shortest solution is found. These searches may run unattended for a long time."""
+    return self._searchBFS or self._searchAStar or self._searchIDA
 
-  def _onSolutionFound(self, solution: Game) -> bool:
+  def _onSolutionFound(self, solution: BaseGame) -> bool:
     """Called when a new solution is found. Return True to stop this attempt with the discovered solution"""
+    solution = solution.materialize()
     if not self.minSolution or solution._numMoves < self.minSolution._numMoves:
       self.minSolution = solution
       self.minSolutionUpdates += 1
     self.solutionDepth[solution._numMoves] += 1
     self.solFindSeconds[int((self.solutionEnd - self.solutionStart + 0.9) // 1)] += 1
-
-    solutionHash = solution._completion_hash()
-    hashingList = self.uniqueSolutions[solutionHash]
+    self._recordUniqueSolution(solution._getCompletionStr(), solution)
+    return True
+  def _onShorterSolutionFound(self, numMoves: int) -> None:
+    """Called when a search that keeps looking for shorter solutions finds one shorter than any before."""
+    pass
+  def _recordUniqueSolution(self, completionStr: str, solution: "Game|SolutionSummary") -> None:
+    hashingList = self.uniqueSolutions[hash(completionStr)]
     if not len(hashingList):
-      self.uniqueSolsDepth[solution._numMoves] += 1
+      self.uniqueSolsDepth[solution.getDepth()] += 1
       self.isUniqueList.append(True)
     else:
       self.isUniqueList.append(False)
     hashingList.append(solution)
 
-    return True
-
-  def _onDeadEndFound(self, deadEnd: Game) -> None:
+  def _onDeadEndFound(self, deadEnd: BaseGame) -> None:
     pass
 
-  def _printQueueCheck(self, current: Game) -> None:
+  def _printQueueCheck(self, current: BaseGame) -> None:
     stats = {
       "resets": self.solutionsAttempted,
       "itrs": self.numIterations,
@@ -1994,6 +3003,9 @@ class BaseSolver:
       "dup games": self.numDuplicateGames,
       "mins": round((time() - self.solutionStart) / 60, 1)
     }
+    if self._searchIDA:
+      stats["bound"] = self._idaBound
+      stats["bound itrs"] = self.numIterations - self._idaBoundStart
     stats_str = "\t".join(f"{stat}: {value}" for stat, value in stats.items())
     print(f"QUEUE CHECK: \t{stats_str}")
 
@@ -2019,6 +3031,12 @@ class BaseSolver:
 
 class AnalysisSolver(BaseSolver):
   lastReportTime = 0
+  branchAndBound = False # Each sample should follow its own random path to a solution
+  moveOrdering = "SHUFFLE"
+  followMacroMoves = False
+
+  def _getWorkerClass(self):
+    return AnalysisWorkerSolver
 
   def _onInitSolutionAttempt(self):
     if not super()._onInitSolutionAttempt(bypassErrorCorrection=True):
@@ -2085,6 +3103,10 @@ class AnalysisSolver(BaseSolver):
 class SolutionSolver(BaseSolver):
   # Static
   MysteryContinuation = False
+  rememberAcrossAttempts = True
+
+  def _getWorkerClass(self):
+    return SolutionWorkerSolver
 
   def _onInitSolutionAttempt(self):
     if not super()._onInitSolutionAttempt(bypassErrorCorrection=True):
@@ -2103,17 +3125,27 @@ class SolutionSolver(BaseSolver):
       self._searchBFS = False
       print("Switching to DFS search for MIX solve method")
     elif self.numIterations % self.QUEUE_CHECK_FREQ == 0:
-      if ENABLE_QUEUE_CHECKS and not self._searchBFS:
-        return current.confirmPrompt("This is a lot. Would you like to continue searching?")
+      if ENABLE_QUEUE_CHECKS and not self._searchesForShortest():
+        if self.minSolution:
+          return current.materialize().confirmPrompt(f"Would you like to keep searching for a solution shorter than {self.minSolution._numMoves} moves?")
+        return current.materialize().confirmPrompt("This is a lot. Would you like to continue searching?")
 
       self._printQueueCheck(current)
       if SOLVE_METHOD == "MIX":
-        switchFaster = current.confirmPrompt("This is a lot. Would you like to switch to a faster approach?", defaultYes=False)
+        switchFaster = current.materialize().confirmPrompt("This is a lot. Would you like to switch to a faster approach?", defaultYes=False)
         if switchFaster:
           self._searchBFS = False
           setSolveMethod("DFS")
 
     return True
+  def _onSolutionFound(self, solution):
+    minSolutionMoves = self._getMinSolutionMoves()
+    stopSearching = super()._onSolutionFound(solution)
+    if not self._searchBFS and self.branchAndBound and self._getMinSolutionMoves() != minSolutionMoves:
+      self._onShorterSolutionFound(solution._numMoves)
+    return stopSearching
+  def _onShorterSolutionFound(self, numMoves):
+    print(f"Found a solution in {numMoves} moves. Still searching for a shorter one.")
 
 
   def _onAfterFindSolutions(self):
@@ -2154,33 +3186,18 @@ class SolutionSolver(BaseSolver):
       print(formatVialColor("er", "Cannot find solution."))
 
 class SafeGameSolver(BaseSolver):
-  """Specialized solver equipped to determine if a partially solved game has any remaining dead ends."""
+  """Specialized solver equipped to determine if a partially solved game has any remaining dead ends.
+  The games are counted by a StepDeadEndCounter, so the results match those shown for each step of a solution."""
   numSolutionsLocated: int
-  deadEndsLocated: list["Game"]
+  deadEndsLocated: list["SearchNode"]
+  _results: DeadEndSearchResults|None
 
   def __init__(self, game):
     super().__init__(game)
 
     self.numSolutionsLocated = 0
     self.deadEndsLocated = []
-
-  def _onInitSolutionAttempt(self):
-    # Bypass
-    if self.seedGame.getDepth() <= 1:
-      self.numDeadEnds = 1 # Initialize to avoid errors
-      print(formatVialColor("er", "Expected game near completion.") + " This game is unsolved and certainly is not safe.")
-      return False
-    return True
-
-  def _onSolutionFound(self, solution):
-    self.numSolutionsLocated += 1
-    return False # Avoid registering this solution, and keep looking for dead-ends
-
-  def _onDeadEndFound(self, deadEnd):
-    self.deadEndsLocated.append(deadEnd)
-
-  def _onImpossibleGame(self):
-    pass # This solver never saves solutions, and will always report "impossible"
+    self._results = None
 
   def solveGame(self, solveMethod = "MIX", numSolutions = 1):
     raise "Method not supported"
@@ -2189,8 +3206,18 @@ class SafeGameSolver(BaseSolver):
     """Searches any combination of moves that would result in a dead end. Returns true if any are found."""
     if self.seedGame.isFinished():
       return False
-    self.findSolutionCount = 1
-    self._findSolutions("BFS", suppressSolveMethodNotification=True)
+    if self.seedGame.getDepth() <= 1:
+      self.numDeadEnds = 1
+      self._results = DeadEndSearchResults(self.seedGame, 0, 0, self.numDeadEnds, 0)
+      print(formatVialColor("er", "Expected game near completion.") + " This game is unsolved and certainly is not safe.")
+      return True
+
+    counter = StepDeadEndCounter(self.seedGame.root, keepDeadEnds=True)
+    self._results = counter.countStep(self.seedGame)
+    self.numIterations = counter.numIterations
+    self.numDeadEnds = counter.numDeadEnds
+    self.numSolutionsLocated = counter.numSolutions
+    self.deadEndsLocated = counter.deadEndsLocated
     return self.numDeadEnds > 0
 
   def analyzeDeadEndStates(self) -> DeadEndSearchResults:
@@ -2199,21 +3226,354 @@ class SafeGameSolver(BaseSolver):
     return self.exportDeadEndSearchResults()
 
   def exportDeadEndSearchResults(self) -> DeadEndSearchResults:
-    try:
-      searchSeconds, _ = SafeGameSolver._getTimeRunning(self.solutionSetStart, self.solutionSetEnd)
-      return DeadEndSearchResults(self.seedGame, self.numIterations, searchSeconds, self.numDeadEnds, self.numSolutionsLocated)
-    except:
-      # Not all of these properties are available when the game is complete
-      return DeadEndSearchResults(self.seedGame, 0, 0, 0, 0, searchDataAvailable=False)
+    # Not available when the game is complete
+    return self._results or DeadEndSearchResults(self.seedGame, 0, 0, 0, 0, searchDataAvailable=False)
+
+class StepDeadEndCounter:
+  """Counts the dead ends and solutions reachable from each step of a solution, expanding every game at most once.
+  Steps are given from the end of the solution, and each one adds only the games that none of the later steps reached.
+  A game can't continue from the vial its last move filled, so a game is searched once for each vial that filled it.
+  Games are remembered only by a 64 bit hash, so big levels fit in memory. Two of MAX_GAMES games share a hash
+  about once in 10 million counts, and a game sharing a hash is only left uncounted.
+  Counting stops once it has searched MAX_GAMES games, and the step being counted is then partial."""
+  MAX_GAMES = 2000000
+  root: "Game"
+  numIterations: int
+  numDeadEnds: int
+  numSolutions: int
+  deadEndsLocated: list[SearchNode]|None # Each dead end found, when they are kept
+  _reached: set[int] # Hash of (board, filledVial) of each game searched
+  _deadEnds: set[int] # Hash of each dead end's board
+  _solutions: set[int] # Hash of each solution's board
+  _isStopped: bool
+  _startTime: float
+
+  def __init__(self, root: "Game", keepDeadEnds: bool = False):
+    self.root = root
+    self.numIterations = 0
+    self.numDeadEnds = 0
+    self.numSolutions = 0
+    self.deadEndsLocated = list() if keepDeadEnds else None
+    self._reached = set()
+    self._deadEnds = set()
+    self._solutions = set()
+    self._isStopped = False
+    self._startTime = time()
+
+  @staticmethod
+  def _getReachedKey(game: BaseGame) -> int:
+    return hash((hash(game._state), game.move[1] if game.move else None))
+
+  def countStep(self, game: BaseGame) -> DeadEndSearchResults|None:
+    """Searches whatever this game reaches that was not reached before.
+    Returns the totals reachable from this game, which are partial when counting stopped during this step.
+    Returns None for the steps after counting has stopped."""
+    if self._isStopped:
+      return None
+    key = StepDeadEndCounter._getReachedKey(game)
+    if key not in self._reached:
+      self._reached.add(key)
+      self._isStopped = not self.__search(game)
+    searchSeconds, _ = BaseSolver._getTimeRunning(self._startTime, time())
+    return DeadEndSearchResults(game, self.numIterations, searchSeconds, self.numDeadEnds, self.numSolutions, isPartial=self._isStopped)
+  def __search(self, game: BaseGame) -> bool:
+    """Returns False when counting stopped before the search finished."""
+    stack = [game]
+    while stack:
+      game = stack.pop()
+      if len(self._reached) > self.MAX_GAMES:
+        return False
+      # Every order of the moves is followed, since each order blocks a different vial
+      nextMoves = game.generateNextMoves(pruneCommuting=False)
+      if Game.reset or Game.quit:
+        return False
+      self.numIterations += 1
+
+      for nextNode in game.generateNextNodes(nextMoves):
+        if nextNode.isFinished():
+          solutionKey = hash(nextNode._state)
+          if solutionKey not in self._solutions:
+            self._solutions.add(solutionKey)
+            self.numSolutions += 1
+          continue
+        key = StepDeadEndCounter._getReachedKey(nextNode)
+        if key not in self._reached:
+          self._reached.add(key)
+          stack.append(nextNode)
+
+      boardKey = hash(game._state)
+      if not nextMoves and boardKey not in self._deadEnds:
+        self._deadEnds.add(boardKey)
+        self.numDeadEnds += 1
+        if self.deadEndsLocated is not None:
+          self.deadEndsLocated.append(game)
+    return True
+
+class WorkerSolver(BaseSolver):
+  """Runs a share of the attempts of a parallel search in a worker process.
+  Attempts are claimed from a count shared by all the workers, so faster workers simply run more of them.
+  Each worker prunes against the shortest solution found by any of them, as soon as it is found."""
+  _attemptsLeft: "multiprocessing.Value" # Attempts not yet claimed by any worker
+  _sharedMinMoves: "multiprocessing.Value" # Moves of the shortest solution of all the workers, or 0 before any is found
+  _attemptNumber: int # Attempts left when the current attempt was claimed, which orders the attempts of all the workers
+  _solutions: list[tuple[int, SolutionSummary]]
+
+  # Collected by each worker on its own, and merged by the main process
+  DEPTH_COUNTERS = ("partialDepth", "dupGameDepth", "swallowedDepth", "deadEndDepth", "solutionDepth", "solFindSeconds")
+
+  def __init__(self, game: "Game", attemptsLeft: "multiprocessing.Value", sharedMinMoves: "multiprocessing.Value"):
+    super().__init__(game)
+    self._attemptsLeft = attemptsLeft
+    self._sharedMinMoves = sharedMinMoves
+    self._attemptNumber = 0
+    self._solutions = list()
+    for name in WorkerSolver.DEPTH_COUNTERS:
+      setattr(self, name, defaultdict(int))
+
+    self.numIterations = 0
+    self.numDeadEnds = 0
+    self.numPartialSolutionsGenerated = 0
+    self.numSwallowedGamesFound = 0
+    self.numUniqueStatesComputed = 0
+    self.numDuplicateGames = 0
+    self.maxQueueLength = 0
+
+  def searchShare(self, solveMethod: BaseSolver.SOLVE_METHODS) -> WorkerResults:
+    self.findSolutionCount = self._attemptsLeft.value
+    self._findSolutions(solveMethod, suppressSolveMethodNotification=True)
+    self._shareOptimalSolution()
+    return self.exportResults()
+
+  def exportResults(self) -> WorkerResults:
+    solutionMoves = self.minSolution.getMovesFromRoot() if self.minSolution else None
+    return WorkerResults(solutionMoves, self.solutionsAttempted, self.minSolutionUpdates, self.numSolutionsAbandoned,
+                         self.numIterations, self.numDeadEnds, self.numPartialSolutionsGenerated, self.numSwallowedGamesFound,
+                         self.numUniqueStatesComputed, self.numDuplicateGames, self.maxQueueLength,
+                         {name: dict(getattr(self, name)) for name in WorkerSolver.DEPTH_COUNTERS}, self._solutions)
+
+  def _shareOptimalSolution(self) -> None:
+    if self._findSolutionsRemaining <= 0:
+      self._attemptsLeft.value = 0 # This worker ruled out any shorter solution, so the other workers can stop too
+  def _claimAttempt(self) -> bool:
+    with self._attemptsLeft.get_lock():
+      if self._attemptsLeft.value <= 0:
+        return False
+      self._attemptNumber = self._attemptsLeft.value
+      self._attemptsLeft.value -= 1
+      return True
+  def _getMinSolutionMoves(self):
+    # Read on every check, so a shorter solution of another worker prunes this one's search right away
+    ownMoves = super()._getMinSolutionMoves()
+    otherMoves = self._sharedMinMoves.get_obj().value
+    if not otherMoves or (ownMoves is not None and ownMoves < otherMoves):
+      return ownMoves
+    return otherMoves
+
+  def _onInitSolutionAttempt(self):
+    self._shareOptimalSolution()
+    return self._claimAttempt()
+
+  def _onIterationReport(self, current):
+    return True # Workers search without prompting
+
+  def _onShorterSolutionFound(self, numMoves):
+    pass # The main process reports the solutions shared by every worker
+
+  def _onSolutionFound(self, solution):
+    super()._onSolutionFound(solution)
+    with self._sharedMinMoves.get_lock():
+      if not self._sharedMinMoves.value or solution._numMoves < self._sharedMinMoves.value:
+        self._sharedMinMoves.value = solution._numMoves
+    return True
+
+  def _recordUniqueSolution(self, completionStr, solution):
+    # Uniqueness is judged once the attempts of every worker are merged
+    self._solutions.append((self._attemptNumber, SolutionSummary(completionStr, solution.getDepth(), solution.completionOrder)))
+
+  def _onImpossibleGame(self):
+    # Another worker found the solutions, unless none of them has
+    return self._getMinSolutionMoves() is not None
+
+class SolutionWorkerSolver(WorkerSolver, SolutionSolver):
+  """Runs a share of the DFR attempts of a `SolutionSolver`."""
+
+class AnalysisWorkerSolver(WorkerSolver, AnalysisSolver):
+  """Runs a share of the samples of an `AnalysisSolver`."""
+
+_solveWorkerArgs: tuple = None
+def _initWorkerProcess(vials: "Vials", drainMode: bool, blindMode: bool) -> "Game":
+  """Prepares any worker process, and returns its copy of the game.
+  The game is created again, so spawned processes intern the colors for themselves."""
+  signal.signal(signal.SIGINT, signal.SIG_IGN) # The main process saves the game when interrupted
+  return Game.Create(vials, drainMode=drainMode, blindMode=blindMode)
+
+def _initSolveWorker(workerClass: "type[WorkerSolver]", vials: "Vials", drainMode: bool, blindMode: bool,
+                     attemptsLeft: "multiprocessing.Value", sharedMinMoves: "multiprocessing.Value") -> None:
+  """Prepares a worker process of the pool that shares the attempts of a search."""
+  global _solveWorkerArgs
+  game = _initWorkerProcess(vials, drainMode, blindMode)
+  random.seed() # Forked workers would otherwise repeat the same random attempts
+  _solveWorkerArgs = (workerClass, game, attemptsLeft, sharedMinMoves)
+def _runSolveWorker(solveMethod: BaseSolver.SOLVE_METHODS) -> WorkerResults:
+  workerClass, game, attemptsLeft, sharedMinMoves = _solveWorkerArgs
+  return workerClass(game, attemptsLeft, sharedMinMoves).searchShare(solveMethod)
+
+def _countStepDeadEndsInWorker(connection: "multiprocessing.connection.Connection", vials: "Vials", drainMode: bool, blindMode: bool,
+                               stepMoves: list[list["Move"]]) -> None:
+  """Counts the steps reached by each list of moves in turn, and sends each step's results as soon as they are known.
+  The results are sent without their game, which stays in the main process."""
+  root = _initWorkerProcess(vials, drainMode, blindMode)
+  counter = StepDeadEndCounter(root)
+  for moves in stepMoves:
+    game = root
+    for move in moves:
+      game = game.spawn(move)
+    results = counter.countStep(game)
+    connection.send((game.getDepth(), (results.searchIterations, results.searchSeconds, results.numDeadEnds, results.numEventualSolutions), results.isPartial))
+    if results.isPartial:
+      break # Counting reached its limit of games
+  connection.close()
+
+class LayerNode(SearchNode):
+  """A game received from another worker of a parallel BFS.
+  Its parent stays with the worker that expanded it, so the node keeps the one thing its moves need from the parent."""
+  __slots__ = ("_commutingContext",)
+
+  def _getCommutingContext(self) -> tuple["Move", int, set[int], "Move|None"] | None:
+    return self._commutingContext
+
+class BFSLayerWorker:
+  """Expands and remembers the games owned by one worker process of a parallel BFS.
+  The workers send each depth's children straight to each other, and the main process asks each worker for its part of the solution."""
+  NodeRef = tuple[int, int] # (workerIndex, nodeId)
+  ChildInfo = tuple[int, int, int, int, bool, "PackedVials", "Move", int, list[tuple[str, int]], "tuple[Move, int, set[int], Move|None]|None"]
+  """ (orderKey, parentWorker, parentId, tableKey, isFinished, state, move, numMoves, completionOrder, commutingContext) """
+
+  workerIndex: int
+  numWorkers: int
+  root: "Game"
+  _movesPerGame: int # More than any game has moves, so a child's order is its parent's order, then its move
+  _seen: TranspositionTable # The games owned by this worker, checked against their boards like the single process search
+  _nodes: list[tuple["NodeRef|None", "Move|None"]] # (parentRef, move) of each game this worker kept
+  _queue: list[tuple[int, int, BaseGame]] # (orderKey, nodeId, game) of the games to expand at the next depth
+  _expanded: dict[int, int] # nodeId -> depth, of the games expanded last, until a child of theirs is kept
+  results: WorkerResults
+
+  def __init__(self, workerIndex: int, numWorkers: int, root: "Game"):
+    self.workerIndex = workerIndex
+    self.numWorkers = numWorkers
+    self.root = root
+    self._movesPerGame = root.getNumVials() ** 2
+    self._seen = TranspositionTable(TRANSPOSITION_TABLE_SIZE // numWorkers)
+    self._nodes = [(None, None)]
+    self._queue = [(0, 0, root)] if workerIndex == 0 else []
+    self._expanded = dict()
+    self.results = WorkerResults(None, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, {name: defaultdict(int) for name in WorkerSolver.DEPTH_COUNTERS}, [])
+
+  def expand(self, acks: list[int]) -> list[list["BFSLayerWorker.ChildInfo"]]:
+    """Expands every queued game. Returns the children to send to each worker."""
+    results = self.results
+    counters = results.depthCounters
+
+    # Games with no kept children were swallowed by other games
+    for nodeId in acks:
+      self._expanded.pop(nodeId, None)
+    for depth in self._expanded.values():
+      results.numSwallowedGamesFound += 1
+      counters["swallowedDepth"][depth] += 1
+    self._expanded = dict()
+
+    outboxes = [list() for _ in range(self.numWorkers)]
+    for orderKey, nodeId, game in self._queue:
+      results.numIterations += 1
+      nextMoves = game.generateNextMoves()
+      if game.isDeadEnd(nextMoves):
+        results.numDeadEnds += 1
+        counters["deadEndDepth"][game._numMoves] += 1
+        continue
+
+      self._expanded[nodeId] = game._numMoves
+      for moveIndex, move in enumerate(nextMoves):
+        nextGame = game.spawnNode(move)
+        results.numPartialSolutionsGenerated += 1
+        counters["partialDepth"][nextGame._numMoves] += 1
+        # The owner checks the key before rebuilding the game, so duplicates are never rebuilt
+        isFinished = nextGame.isFinished()
+        outboxes[nextGame._hash % self.numWorkers].append((orderKey * self._movesPerGame + moveIndex, self.workerIndex, nodeId,
+          TranspositionTable._getKey(nextGame, isFinished), isFinished, nextGame._state, move, nextGame._numMoves,
+          nextGame.completionOrder, nextGame._getCommutingContext()))
+    self._queue = list()
+    return outboxes
+
+  def receive(self, children: list["BFSLayerWorker.ChildInfo"]) -> tuple[dict[int, list[int]], list[tuple[int, "NodeRef"]], list[int]]: # (acks, solutions, queuedKeys)
+    """Keeps the first arrival of each game, in the order the single process search would generate them.
+    Returns the parents with a kept child for each worker, the (orderKey, nodeRef) of each new solution, and the orderKey of each game queued."""
+    results = self.results
+    counters = results.depthCounters
+    acks: defaultdict[int, list[int]] = defaultdict(list)
+    solutions = []
+    children.sort(key=lambda child: child[0])
+    for orderKey, parentWorker, parentId, tableKey, isFinished, state, move, numMoves, completionOrder, commutingContext in children:
+      state = tuple(BaseGame._internVial(vial) for vial in state)
+      if not self._seen.recordState(tableKey, state, BaseGame._getBlockedVialAfter(state, move), numMoves, isFinished):
+        results.numDuplicateGames += 1
+        counters["dupGameDepth"][numMoves] += 1
+        continue
+
+      acks[parentWorker].append(parentId)
+      nodeId = len(self._nodes)
+      self._nodes.append(((parentWorker, parentId), move))
+      if isFinished:
+        counters["solutionDepth"][numMoves] += 1
+        solutions.append((orderKey, (self.workerIndex, nodeId)))
+      else:
+        self._queue.append((orderKey, nodeId, self._restoreGame(state, move, numMoves, completionOrder, commutingContext)))
+
+    results.numUniqueStatesComputed = self._seen.numRecorded
+    return (dict(acks), solutions, [orderKey for orderKey, _, _ in self._queue])
+
+  def getNode(self, nodeId: int) -> tuple["BFSLayerWorker.NodeRef|None", "Move|None"]: # (parentRef, move)
+    return self._nodes[nodeId]
+
+  def _restoreGame(self, state: "PackedVials", move: "Move", numMoves: int, completionOrder: list[tuple[str, int]],
+                   commutingContext: tuple["Move", int, set[int], "Move|None"] | None) -> LayerNode:
+    """Rebuilds a game made by another worker, without its parent."""
+    game = LayerNode(state, move, self.root)
+    game._numMoves = numMoves
+    game.completionOrder = completionOrder
+    game._commutingContext = commutingContext
+    return game
+
+def _runBFSLayerWorker(connection: "multiprocessing.connection.Connection", inboxes: list[multiprocessing.Queue], workerIndex: int, numWorkers: int,
+                       vials: "Vials", drainMode: bool, blindMode: bool) -> None:
+  worker = BFSLayerWorker(workerIndex, numWorkers, _initWorkerProcess(vials, drainMode, blindMode))
+  while True:
+    command, arg = connection.recv()
+    if command == "step":
+      # Every worker sends one outbox to every other worker each depth, even an empty one
+      outboxes = worker.expand(arg)
+      numSent = sum(map(len, outboxes))
+      for ownerIndex, children in enumerate(outboxes):
+        if ownerIndex != workerIndex:
+          inboxes[ownerIndex].put(children)
+      children = outboxes[workerIndex]
+      for _ in range(numWorkers - 1):
+        children.extend(inboxes[workerIndex].get())
+      connection.send((numSent, *worker.receive(children)))
+    elif command == "getNode":
+      connection.send(worker.getNode(arg))
+    elif command == "finish":
+      connection.send(worker.results)
+      return
 
 
 
 def solveGame(game: "Game", solveMethod = "MIX", analyzeSampleCount = 0, probeDFRSamples = 0):
   solver = AnalysisSolver(game) if analyzeSampleCount > 0 else SolutionSolver(game)
   numSolutions = analyzeSampleCount or probeDFRSamples
-  if solveMethod == "DFS" or solveMethod == "BFS":
-    numSolutions = 1
-  solver.solveGame(solveMethod, numSolutions=numSolutions)
+  if solveMethod in ("DFS", "BFS", "ASTAR", "IDA", "BEAM"):
+    numSolutions = 1 # Deterministic searches find the same solution every attempt
+  solver.solveGame(solveMethod, numSolutions=numSolutions, numWorkers=SOLVE_WORKERS)
   pass
 
 def testSolutionPrints(solution: "Game"):
@@ -2405,6 +3765,8 @@ def chooseInteraction():
         level = sys.argv[2]
       if len(sys.argv) > 3:
         analyzeSamples = int(sys.argv[3])
+      if len(sys.argv) > 4:
+        setSolveWorkers(sys.argv[4])
 
     # Playing a level
     else:
@@ -2425,24 +3787,32 @@ def chooseInteraction():
           mode = "a"
           if len(sys.argv) > 3:
             analyzeSamples = int(sys.argv[3])
+          if len(sys.argv) > 4:
+            setSolveWorkers(sys.argv[4])
         else:
           setSolveMethod(sys.argv[2])
       if len(sys.argv) > 3 and SOLVE_METHOD == "DFR":
         dfrSearchAttempts = int(sys.argv[3])
+      if len(sys.argv) > 4 and mode == "i" and SOLVE_METHOD == "DFR":
+        setSolveWorkers(sys.argv[4])
+      if len(sys.argv) > 3 and SOLVE_METHOD == "BEAM":
+        setBeamWidth(sys.argv[3])
+      if len(sys.argv) > 3 and SOLVE_METHOD == "BFS":
+        setSolveWorkers(sys.argv[3])
 
 
   # Request the mode
   while not mode:
     print("""
           How are we interacting?
-          NAME                      level name
-          p LEVEL?                  play
-          n                         solve (from new input)
-          i                         interact (or resume an existing game)
-          a LEVEL? SAMPLES?         analyze
-          q                         quit
-          d                         debug mode
-          m METHOD                  method of solving
+          NAME                         level name
+          p LEVEL?                     play
+          n                            solve (from new input)
+          i                            interact (or resume an existing game)
+          a LEVEL? SAMPLES? WORKERS?   analyze
+          q                            quit
+          d                            debug mode
+          m METHOD                     method of solving
           """)
     response = input().strip()
     words = response.split()
@@ -2461,6 +3831,8 @@ def chooseInteraction():
         level = words[1]
       if len(words) > 2:
         analyzeSamples = int(words[2])
+      if len(words) > 3:
+        setSolveWorkers(words[3])
     elif firstWord == "p":
       mode = "p"
       if len(words) > 1:
@@ -2597,6 +3969,25 @@ def setSolveMethod(method: str, suppressNotification=False) -> bool:
 
   if not suppressNotification: print("Set solve method to " + method)
   return True
+def setBeamWidth(width: str) -> bool:
+  if not width.isdigit() or int(width) < 1:
+    print(f"Beam width '{width}' is not a valid input. Provide a positive number instead.")
+    return False
+
+  global BEAM_WIDTH
+  BEAM_WIDTH = int(width)
+  print(f"Set beam width to {BEAM_WIDTH}")
+  return True
+
+def setSolveWorkers(workers: str) -> bool:
+  if not workers.isdigit():
+    print(f"Worker count '{workers}' is not a valid input. Provide a number of processes, or 0 to use every core.")
+    return False
+
+  global SOLVE_WORKERS
+  SOLVE_WORKERS = int(workers)
+  print(f"Set solve workers to {SOLVE_WORKERS or 'every core'}")
+  return True
 
 def generateAnalysisResultsName(level: str, absolutePath: bool = None) -> str:
   annualizedName = annualizeDailyPuzzleFileName(level)
@@ -2680,7 +4071,7 @@ def prepareUniqueDistribution(targetCount: int, isUniqueList: list[bool]) -> def
       uniqueSolvesDistribution[int(1 + (index // divisor))] += 1
 
   return uniqueSolvesDistribution
-def printUniqueSolutions(uniqueSolutions: defaultdict[int, list[Game]]) -> None:
+def printUniqueSolutions(uniqueSolutions: defaultdict[int, list["Game|SolutionSummary"]]) -> None:
   PRINT_SOL_COUNT = 15
   out = []
 
@@ -2692,7 +4083,7 @@ def printUniqueSolutions(uniqueSolutions: defaultdict[int, list[Game]]) -> None:
 
   print("".join(out))
   pass
-def prepareCompletionOrderData(rootGame: Game, uniqueSolutions: defaultdict[int, list[Game]]) -> tuple[defaultdict[int, str], defaultdict[int, str]]:
+def prepareCompletionOrderData(rootGame: Game, uniqueSolutions: defaultdict[int, list["Game|SolutionSummary"]]) -> tuple[defaultdict[int, str], defaultdict[int, str]]:
   # We're going to be creating ";" separate strings that occupy a single column,
   # but will be expanded into multiple columns for analysis
   # Remember that our output defaultdict's must be from range 1 to n
@@ -2830,12 +4221,14 @@ signal.signal(signal.SIGINT, signalHandler)
 
 # Run the program!
 # Call signatures:
-# py watersort.py LEVEL a SAMPLES?
-# py watersort.py a LEVEL SAMPLES?
+# py watersort.py LEVEL a SAMPLES? WORKERS?
+# py watersort.py a LEVEL SAMPLES? WORKERS?
 
 # GAMEPLAY_MODE can appear anywhere in the list
 # py watersort.py <GAMEPLAY_MODE?> LEVEL <MODE>
 # py watersort.py LEVEL <GAMEPLAY_MODE?> <MODE>
 # py watersort.py LEVEL <MODE> <GAMEPLAY_MODE?>
-# py watersort.py <GAMEPLAY_MODE?> LEVEL dfr SAMPLES?
-chooseInteraction()
+# py watersort.py <GAMEPLAY_MODE?> LEVEL dfr SAMPLES? WORKERS?
+# py watersort.py <GAMEPLAY_MODE?> LEVEL bfs WORKERS?
+if __name__ == "__main__": # Worker processes import this file without running it
+  chooseInteraction()